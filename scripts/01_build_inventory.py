@@ -12,6 +12,179 @@ from tqdm import tqdm
 sys.path.append(str(Path(__file__).parent.parent))
 
 from scripts.utils import load_config, compute_week48, get_session, setup_logger, calculate_slot_with_tolerance
+from scripts.checkpoint_writer import ScanCheckpoint, StreamingCsvWriter
+
+# Feste Spaltenreihenfolge, damit alle Batches dasselbe Schema haben
+INVENTORY_COLUMNS = [
+    "size_bytes", "filename", "filepath", "is_empty", "wav_readable", "scan_status",
+    "recorder_id", "start_dt", "date", "month", "birdnet_week48", "session", "file_id",
+    "min_to_sunrise", "min_to_sunset", "solar_slot", "duration_s", "samplerate", "channels",
+    "format", "subtype", "end_dt", "birdnet_status", "perch_status", "updated_at", "last_error",
+]
+ANOMALY_COLUMNS = ["file", "issue", "val", "detail"]
+
+# --- EINE DATEI SCANNEN ---
+
+def scan_file(p, cfg, df_sun, filename_pattern, logger):
+    """
+    Scannt eine WAV-Datei (Größe, Dateiname, Sonnen-Slot, Audioheader).
+
+    Returns:
+        (row, anomalies) - die Inventory-Zeile und die Liste der gefundenen Anomalien.
+    """
+    morning = cfg["session_rules"]["morning_hours"]
+    evening = cfg["session_rules"]["evening_hours"]
+
+    # Slot-Regeln aus der YAML (Toleranz + erlaubte Offsets)
+    tolerance_min = cfg["sun_checks"]["tolerance_min"]
+    allowed_slots = cfg["sun_checks"]["allowed_slot_min"]
+
+    anomalies = []
+    row = {}
+
+    # A) Dateigröße prüfen
+    stat = p.stat()
+    size_bytes = stat.st_size
+    row["size_bytes"] = size_bytes
+    row["filename"] = p.name
+    row["filepath"] = str(p) # Absoluter Pfad für den Reader später
+
+    # Default Werte für Fehlerfall
+    row["is_empty"] = False
+    row["wav_readable"] = False
+    row["scan_status"] = "pending"
+
+    # 1. Check: Leere Datei
+    if size_bytes == 0:
+        row["is_empty"] = True
+        row["scan_status"] = "empty_file"
+        row["last_error"] = "0 Byte File"
+        logger.error(f"{p.name} :Kritischer Fehler: Datei leer")
+        anomalies.append({"file": p.name, "issue": "empty_file"})
+        return row, anomalies
+
+    # B) Dateiname Parsen (Regex)
+    match = filename_pattern.match(p.name)
+    if not match:
+        row["scan_status"] = "bad_filename"
+        row["last_error"] = "Regex mismatch"
+        logger.error(f"{p.name} Kritischer Fehler: Dateiname nicht im Schema")
+        anomalies.append({"file": p.name, "issue": "bad_filename"})
+        return row, anomalies
+
+    info = match.groupdict()
+
+    try:
+        # Datum parsen: YYYYMMDD + HHMMSS
+        dt_str = f"{info['date']}{info['time']}"
+        start_dt = datetime.strptime(dt_str, "%Y%m%d%H%M%S")
+        row["recorder_id"] = info["rec"]
+        row["start_dt"] = start_dt
+        row["date"] = start_dt.date()
+        row["month"] = start_dt.month
+
+        # Abgeleitete Metadaten
+        if cfg["birdnet_week48"]["enabled"]:
+            row["birdnet_week48"] = compute_week48(start_dt)
+        
+        session = get_session(start_dt, morning, evening)
+        row["session"] = session
+        
+        # File ID erstellen (WICHTIG für Datenbank/Parquet später)
+        # Format: RECORDER_YYYYMMDD_HHMMSS - Eindeutige ID
+        row["file_id"] = f"{info['rec']}_{start_dt.strftime('%Y%m%d_%H%M%S')}"
+
+        #################
+        # Wir suchen die passende Zeile in der Referenztabelle
+        sun_row = df_sun[df_sun["date"] == row["date"]]
+
+        if not sun_row.empty:
+            # Zeiten holen
+            sr = sun_row.iloc[0]["sunrise_naive"]
+            ss = sun_row.iloc[0]["sunset_naive"]
+
+            slot = None
+            diff = None
+
+            if session == "morning":
+                slot, diff = calculate_slot_with_tolerance(start_dt, sr, "sunrise", tolerance_min, allowed_slots)
+                row["min_to_sunrise"] = round(diff, 1) if diff is not None else None
+                row["min_to_sunset"] = None
+            
+            elif session == "evening":
+                # Abends -> Sunset prüfen
+                slot, diff = calculate_slot_with_tolerance(start_dt, ss, "sunset", tolerance_min, allowed_slots)
+                row["min_to_sunrise"] = None
+                row["min_to_sunset"] = round(diff, 1) if diff is not None else None
+
+            else:
+                # Mittag/Nacht -> Kein Slot
+                slot = "other_time"
+                row["min_to_sunrise"] = None
+                row["min_to_sunset"] = None
+            
+            if slot is None:
+                if session == "morning": slot = "morning_no_slot"
+                elif session == "evening": slot = "evening_no_slot"
+
+            row["solar_slot"] = slot
+        
+        else:
+            row["solar_slot"] = "no_ref_data"
+            anomalies.append({"file": p.name, "issue": "Missing Sun Data"})   
+
+        ###############
+
+    except ValueError as e:
+        row["scan_status"] = "bad_timestamp"
+        row["last_error"] = str(e)
+
+        logger.error(f"{p.name} Kritischer Fehler: Datum falsch")
+
+        anomalies.append({"file": p.name, "issue": "bad_timestamp"})
+        return row, anomalies
+
+
+
+
+    # ========== Audioheader lesen mit Soundfile (alternativ mit wave ) ======
+    try:
+        # sf.info liest nur den Header, sehr schnell!
+        sf_info = sf.info(str(p))
+        
+        row["duration_s"] = sf_info.duration
+        row["samplerate"] = sf_info.samplerate
+        row["channels"] = sf_info.channels
+        row["format"] = sf_info.format      # z.B. WAV
+        row["subtype"] = sf_info.subtype    # z.B. PCM_16
+
+        # Plausibilitäts-Check: Ist Datei extrem kurz? (< 1 Sekunde)
+        if sf_info.duration < 300.0:
+            logger.error(f"{p.name} Kritischer Fehler: Datei ist zu kurz")
+            anomalies.append({"file": p.name, "issue": "too_short", "val": sf_info.duration})
+
+
+        # Alles okay
+        row["wav_readable"] = True
+        row["scan_status"] = "scanned"
+        
+        # Endzeit berechnen
+        row["end_dt"] = start_dt + timedelta(seconds=sf_info.duration)
+
+    except Exception as e:
+        row["wav_readable"] = False
+        row["scan_status"] = "failed_read"
+        row["last_error"] = str(e)
+        logger.error(f"{p.name} Kritischer Fehler: Audio nicht lesbar")
+        anomalies.append({"file": p.name, "issue": "corrupt_audio", "detail": str(e)})
+
+    # Initialisiere Pipeline-Status Spalten (für spätere Skripte)
+    row["birdnet_status"] = "pending" if row["wav_readable"] else "blocked"
+    row["perch_status"] = "pending" if row["wav_readable"] else "blocked"
+    row["updated_at"] = datetime.now()
+
+    return row, anomalies
+
 
 # --- HAUPTFUNKTION ---
 
@@ -54,8 +227,6 @@ def main():
 
     # Regex aus YAML kompilieren
     filename_pattern = re.compile(cfg["scan"]["filename_regex"], re.IGNORECASE)
-    morning = cfg["session_rules"]["morning_hours"]
-    evening = cfg["session_rules"]["evening_hours"]
 
     logger.info(f"Scanne Ordner: {audio_dir}")
     if not audio_dir.exists():
@@ -66,186 +237,44 @@ def main():
     files = sorted(list(set(audio_dir.rglob("*.wav")) | set(audio_dir.rglob("*.WAV"))))    
     logger.info(f"{len(files)} Dateien gefunden.")
 
-    inventory_rows = []
-    anomalies = []
+    # Zeilen werden batchweise in .partial-Dateien geschrieben statt im RAM gesammelt.
+    # Der Checkpoint merkt sich die fertigen Dateien -> nach einem Absturz geht es dort weiter.
+    inventory_writer = StreamingCsvWriter(output_csv, INVENTORY_COLUMNS)
+    anomaly_writer = StreamingCsvWriter(qc_csv, ANOMALY_COLUMNS)
+    checkpoint = ScanCheckpoint(
+        output_csv.with_name(output_csv.name + ".checkpoint.json"),
+        {"inventory": inventory_writer, "anomalies": anomaly_writer},
+    )
+    done = checkpoint.resume()
+    if done:
+        logger.info(f"Checkpoint gefunden: {len(done)} Dateien bereits gescannt, mache dort weiter.")
+
+    todo = [p for p in files if str(p) not in done]
+    checkpoint_every = cfg["scan"]["checkpoint_every"]
 
     # --- SCHLEIFE MIT PROGRESSBAR (tqdm) ---
-    for p in tqdm(files, desc="Verarbeite Audio", unit="file"):
-        row = {}
-
-        # A) Dateigröße prüfen
-        stat = p.stat()
-        size_bytes = stat.st_size
-        row["size_bytes"] = size_bytes
-        row["filename"] = p.name
-        row["filepath"] = str(p) # Absoluter Pfad für den Reader später
-
-        # Default Werte für Fehlerfall
-        row["is_empty"] = False
-        row["wav_readable"] = False
-        row["scan_status"] = "pending"
-
-        # 1. Check: Leere Datei
-        if size_bytes == 0:
-            row["is_empty"] = True
-            row["scan_status"] = "empty_file"
-            row["last_error"] = "0 Byte File"
-            logger.error(f"{p.name} :Kritischer Fehler: Datei leer")
-            anomalies.append({"file": p.name, "issue": "empty_file"})
-            inventory_rows.append(row)
-            continue
-
-        # B) Dateiname Parsen (Regex)
-        match = filename_pattern.match(p.name)
-        if not match:
-            row["scan_status"] = "bad_filename"
-            row["last_error"] = "Regex mismatch"
-            logger.error(f"{p.name} Kritischer Fehler: Dateiname nicht im Schema")
-            anomalies.append({"file": p.name, "issue": "bad_filename"})
-            inventory_rows.append(row)
-            continue
-
-        info = match.groupdict()
-
-        try:
-            # Datum parsen: YYYYMMDD + HHMMSS
-            dt_str = f"{info['date']}{info['time']}"
-            start_dt = datetime.strptime(dt_str, "%Y%m%d%H%M%S")
-            row["recorder_id"] = info["rec"]
-            row["start_dt"] = start_dt
-            row["date"] = start_dt.date()
-            row["month"] = start_dt.month
-
-            # Abgeleitete Metadaten
-            if cfg["birdnet_week48"]["enabled"]:
-                row["birdnet_week48"] = compute_week48(start_dt)
-            
-            session = get_session(start_dt, morning, evening)
-            row["session"] = session
-            
-            # File ID erstellen (WICHTIG für Datenbank/Parquet später)
-            # Format: RECORDER_YYYYMMDD_HHMMSS - Eindeutige ID
-            row["file_id"] = f"{info['rec']}_{start_dt.strftime('%Y%m%d_%H%M%S')}"
-
-            #################
-            # Wir suchen die passende Zeile in der Referenztabelle
-            sun_row = df_sun[df_sun["date"] == row["date"]]
-
-            if not sun_row.empty:
-                # Zeiten holen
-                sr = sun_row.iloc[0]["sunrise_naive"]
-                ss = sun_row.iloc[0]["sunset_naive"]
-
-                slot = None
-                diff = None
-
-                if session == "morning":
-                    slot, diff = calculate_slot_with_tolerance(start_dt, sr, "sunrise", tolerance_min=15)
-                    row["min_to_sunrise"] = round(diff, 1) if diff is not None else None
-                    row["min_to_sunset"] = None
-                
-                elif session == "evening":
-                    # Abends -> Sunset prüfen
-                    slot, diff = calculate_slot_with_tolerance(start_dt, ss, "sunset", tolerance_min=15)
-                    row["min_to_sunrise"] = None
-                    row["min_to_sunset"] = round(diff, 1) if diff is not None else None
-
-                else:
-                    # Mittag/Nacht -> Kein Slot
-                    slot = "other_time"
-                    row["min_to_sunrise"] = None
-                    row["min_to_sunset"] = None
-                
-                if slot is None:
-                    if session == "morning": slot = "morning_no_slot"
-                    elif session == "evening": slot = "evening_no_slot"
-
-                row["solar_slot"] = slot
-            
-            else:
-                row["solar_slot"] = "no_ref_data"
-                anomalies.append({"file": p.name, "issue": "Missing Sun Data"})   
-
-            ###############
-
-        except ValueError as e:
-            row["scan_status"] = "bad_timestamp"
-            row["last_error"] = str(e)
-
-            logger.error(f"{p.name} Kritischer Fehler: Datum falsch")
-
-            anomalies.append({"file": p.name, "issue": "bad_timestamp"})
-            inventory_rows.append(row)
-            continue
-
-
-
-
-        # ========== Audioheader lesen mit Soundfile (alternativ mit wave ) ======
-        try:
-            # sf.info liest nur den Header, sehr schnell!
-            sf_info = sf.info(str(p))
-            
-            row["duration_s"] = sf_info.duration
-            row["samplerate"] = sf_info.samplerate
-            row["channels"] = sf_info.channels
-            row["format"] = sf_info.format      # z.B. WAV
-            row["subtype"] = sf_info.subtype    # z.B. PCM_16
-
-            # Plausibilitäts-Check: Ist Datei extrem kurz? (< 1 Sekunde)
-            if sf_info.duration < 300.0:
-                logger.error(f"{p.name} Kritischer Fehler: Datei ist zu kurz")
-                anomalies.append({"file": p.name, "issue": "too_short", "val": sf_info.duration})
-
+    for i, p in enumerate(tqdm(todo, desc="Verarbeite Audio", unit="file"), start=1):
+        row, file_anomalies = scan_file(p, cfg, df_sun, filename_pattern, logger)
 
-            # Alles okay
-            row["wav_readable"] = True
-            row["scan_status"] = "scanned"
-            
-            # Endzeit berechnen
-            row["end_dt"] = start_dt + timedelta(seconds=sf_info.duration)
-
-        except Exception as e:
-            row["wav_readable"] = False
-            row["scan_status"] = "failed_read"
-            row["last_error"] = str(e)
-            logger.error(f"{p.name} Kritischer Fehler: Audio nicht lesbar")
-            anomalies.append({"file": p.name, "issue": "corrupt_audio", "detail": str(e)})
-    
-        # Initialisiere Pipeline-Status Spalten (für spätere Skripte)
-        row["birdnet_status"] = "pending" if row["wav_readable"] else "blocked"
-        row["perch_status"] = "pending" if row["wav_readable"] else "blocked"
-        row["updated_at"] = datetime.now()
+        inventory_writer.append(row)
+        for anomaly in file_anomalies:
+            anomaly_writer.append(anomaly)
+        done.add(str(p))
 
-        inventory_rows.append(row)
+        if i % checkpoint_every == 0:
+            checkpoint.commit(done)
 
     # ======== SPEICHERN DER CSV =============
-    output_csv.parent.mkdir(parents=True, exist_ok=True)
-    qc_csv.parent.mkdir(parents=True, exist_ok=True)
-
-    df = pd.DataFrame(inventory_rows)
-
-    # Speichern (Atomic-ish: erst schreiben, dann ist es da)
-    logger.info(f"Speichere Inventory ({len(df)} Zeilen) nach: {output_csv}")
-    df.to_csv(output_csv, index=False)
-
-    # Anomalien speichern
-    if anomalies:
-        df_anom = pd.DataFrame(anomalies)
-        logger.info(f"ACHTUNG: {len(anomalies)} Anomalien gefunden! Siehe: {qc_csv}")
-        df_anom.to_csv(qc_csv, index=False)
+    # Letzten Stand sichern, dann .partial atomar an die Zielstelle verschieben
+    checkpoint.commit(done)
+    logger.info(f"Speichere Inventory ({inventory_writer.n_rows} Zeilen) nach: {output_csv}")
+    n_anomalies = anomaly_writer.n_rows
+    checkpoint.finish()
+
+    if n_anomalies:
+        logger.info(f"ACHTUNG: {n_anomalies} Anomalien gefunden! Siehe: {qc_csv}")
     else:
         logger.info("Keine Anomalien gefunden. Saubere Daten!")
 
 if __name__ == "__main__":
     main()
-
-
-
-
-
-
-
-
-
-
@@ -0,0 +1,196 @@
+import os
+import sys
+import pandas as pd
+from pathlib import Path
+from datetime import datetime
+from tqdm import tqdm
+
+# Wir sagen Python: "Der Hauptordner ist eins weiter oben (project)"
+sys.path.append(str(Path(__file__).parent.parent))
+
+from scripts.utils import load_config, setup_logger
+from scripts.chunked_predict import DETECTION_COLUMNS, make_model_predictor
+from scripts.multi_model import ModelSpec, plan_multi_chunks, predict_multi_chunked
+from scripts.prefetch import PrefetchPipeline
+from scripts.merge_events import events_path, merge_detection_windows, write_events
+from scripts.activity_cube import ActivityCube
+from scripts.score_store import ScoreStore
+
+MODEL_NAMES = ["birdnet", "perch"]
+
+
+def load_model(name):
+    """
+    Lädt ein Modell der birdnet-Library (wie im Notebook 02_birdnet_experiments).
+    """
+    import birdnet
+    if name == "birdnet":
+        return birdnet.load("acoustic", "2.4", "tf")
+    if name == "perch":
+        return birdnet.load_perch_v2("CPU")
+    raise ValueError(f"Unbekanntes Modell: {name}")
+
+
+def save_inventory(df, path):
+    """
+    Schreibt das Inventory über eine temporäre Datei und ersetzt dann atomar.
+    """
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    df.to_csv(tmp, index=False)
+    os.replace(tmp, path)
+
+
+# --- HAUPTFUNKTION ---
+
+def main():
+    config_path = "config/pipeline.yaml"
+    cfg = load_config(config_path)
+
+    logger = setup_logger("Inference", cfg["paths"]["pipeline_log"])
+    logger.info("--- START Inference (BirdNET + Perch, ein Decode pro Datei) ---")
+
+    inventory_csv = Path(cfg["paths"]["inventory_csv"])
+    detections_dir = Path(cfg["paths"]["detections_dir"])
+    inf = cfg["inference"]
+
+    if not inventory_csv.exists():
+        logger.critical("Inventory fehlt! Bitte erst '01_build_inventory.py' ausführen.")
+        sys.exit(1)
+
+    df_inv = pd.read_csv(inventory_csv)
+    # Spalten beschreibbar machen (leere CSV-Spalten werden sonst als float gelesen)
+    df_inv["last_error"] = df_inv["last_error"].astype("object")
+    df_inv["updated_at"] = pd.to_datetime(df_inv["updated_at"], format="mixed")
+
+    # Nur Dateien, bei denen mindestens ein Modell noch aussteht
+    status_cols = [f"{m}_status" for m in MODEL_NAMES]
+    todo_mask = (df_inv[status_cols] == "pending").any(axis=1)
+    todo = df_inv[todo_mask].sort_values("filepath")
+    logger.info(f"{len(todo)} Dateien mit offenen Modellen gefunden.")
+    if todo.empty:
+        return
+
+    # Temporäre Chunk-WAVs auf schnellem lokalem Speicher (nicht auf der USB-SSD)
+    tmp_dir = inf.get("tmp_dir")
+    if tmp_dir:
+        Path(tmp_dir).mkdir(parents=True, exist_ok=True)
+
+    # Modelle nur laden, wenn sie gebraucht werden
+    specs = {}
+    stores = {}
+    scfg = cfg["score_store"]
+    for name in MODEL_NAMES:
+        if not (todo[f"{name}_status"] == "pending").any():
+            continue
+        logger.info(f"Lade Modell: {name}")
+        model = load_model(name)
+        predict_kwargs = {"default_confidence_threshold": inf["default_confidence_threshold"]}
+        if name in scfg["models"]:
+            # Roh-Logits bis zum Floor holen; Detektionen entstehen danach aus dem Score-Store
+            stores[name] = ScoreStore(
+                Path(cfg["paths"]["scores_dir"]) / name, min_logit=scfg["min_logit"], top_k=scfg["top_k"]
+            )
+            predict_kwargs.update(
+                apply_sigmoid=False, default_confidence_threshold=scfg["min_logit"], top_k=scfg["top_k"]
+            )
+        elif name == "birdnet":
+            # Sigmoid-Sensitivität gibt es nur bei BirdNET
+            predict_kwargs["sigmoid_sensitivity"] = inf["sigmoid_sensitivity"]
+        predict_fn = make_model_predictor(model, inf["overlap_duration_s"], tmp_dir=tmp_dir, **predict_kwargs)
+        specs[name] = ModelSpec(
+            name=name,
+            samplerate=inf["models"][name]["samplerate"],
+            window_s=inf["models"][name]["window_s"],
+            overlap_s=inf["overlap_duration_s"],
+            predict_fn=predict_fn,
+        )
+        (detections_dir / name).mkdir(parents=True, exist_ok=True)
+
+    # Puffer-Plan einmal vorab prüfen: ein Konfigurationsfehler (z.B. zu kleines
+    # max_buffer_mb) soll den Lauf stoppen, statt jede Datei auf 'failed' zu setzen
+    formats = todo[["samplerate", "channels"]].dropna().drop_duplicates()
+    for sr, ch in formats.itertuples(index=False):
+        try:
+            plan_multi_chunks(int(sr), int(ch), list(specs.values()), inf["max_buffer_mb"])
+        except ValueError as e:
+            logger.critical(
+                f"Konfigurationsfehler: inference.max_buffer_mb={inf['max_buffer_mb']} reicht bei "
+                f"{int(sr)} Hz / {int(ch)} Kanälen nicht für alle Modelle ({e})"
+            )
+            sys.exit(1)
+
+    # Aktivitäts-Cubes (einer pro Modell): jedes update() landet sofort im Log
+    cube_dir = Path(cfg["paths"]["activity_cube_dir"])
+    compact_every = cfg["activity_cube"]["compact_every"]
+    cubes = {name: ActivityCube.load(cube_dir / f"{name}.json", compact_every=compact_every) for name in specs}
+
+    def run_models(item):
+        """Stage für die Prefetch-Pipeline: alle offenen Modelle auf einer vorgelesenen Datei."""
+        row = item.row
+        pending = [specs[m] for m in MODEL_NAMES if row[f"{m}_status"] == "pending" and m in specs]
+        if not pending:
+            return {}, {}
+        try:
+            return predict_multi_chunked(
+                item.open(), pending, max_buffer_mb=inf["max_buffer_mb"], file_id=row["file_id"]
+            )
+        except Exception as e:
+            # Datei nicht dekodierbar -> alle offenen Modelle scheitern (geloggt wird in der Schleife)
+            return {}, {spec.name: e for spec in pending}
+
+    # Lesen (USB-SSD) und Rechnen überlappen
+    pipe = PrefetchPipeline(prefetch_mb=cfg["io"]["prefetch_mb"], read_block_mb=cfg["io"]["read_block_mb"])
+    rows = [dict(row, _idx=idx) for idx, row in todo.iterrows()]
+
+    # --- SCHLEIFE MIT PROGRESSBAR (tqdm) ---
+    for item, result, error in tqdm(pipe.run(rows, run_models), total=len(rows), desc="Inference", unit="file"):
+        idx = item.row["_idx"]
+        file_id = item.row["file_id"]
+
+        if error is not None:
+            results, errors = {}, {m: error for m in MODEL_NAMES if item.row[f"{m}_status"] == "pending"}
+        else:
+            results, errors = result
+
+        for name, df_det in results.items():
+            if name in stores:
+                stores[name].write(file_id, df_det)
+                df_det = stores[name].detections(
+                    inf["default_confidence_threshold"], inf["sigmoid_sensitivity"],
+                    file_ids=[file_id], strict=False,
+                )
+                n_incomplete = (~df_det["window_complete"].astype(bool)).sum()
+                if n_incomplete:
+                    logger.warning(f"{file_id} {name}: {n_incomplete} Detektionen in Fenstern, die top_k gekappt hat")
+                # Export-Schema für alle Modelle gleich (window_complete nur fürs Logging)
+                df_det = df_det[DETECTION_COLUMNS]
+            window_csv = detections_dir / name / f"{file_id}.csv"
+            df_det.to_csv(window_csv, index=False)
+
+            # Events statt Einzelfenster exportieren und zählen (sonst ~3x überzählt)
+            events = merge_detection_windows(df_det, max_gap_s=cfg["events"]["max_gap_s"])
+            write_events(events, events_path(window_csv))
+            df_inv.at[idx, f"{name}_status"] = "done"
+            cubes[name].update(events, df_inv.loc[[idx]], file_ids=[file_id], conf_col="max_confidence")
+        # Jeden Fehler nur einmal loggen (ein Decode-Fehler trifft alle offenen Modelle)
+        failed = {}
+        for name, e in errors.items():
+            failed.setdefault(id(e), (e, []))[1].append(name)
+            df_inv.at[idx, f"{name}_status"] = "failed"
+            df_inv.at[idx, "last_error"] = str(e)
+        for e, names in failed.values():
+            logger.error(f"{file_id} {', '.join(names)} fehlgeschlagen: {e}")
+
+        df_inv.at[idx, "updated_at"] = datetime.now()
+        save_inventory(df_inv, inventory_csv)
+
+    # Logs der Cubes in die Snapshots übernehmen
+    for cube in cubes.values():
+        cube.save()
+
+    logger.info(f"I/O-Statistik: {pipe.stats.summary()}")
+    logger.info("--- ENDE Inference ---")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import sys
+import pandas as pd
+from pathlib import Path
+from tqdm import tqdm
+
+# Wir sagen Python: "Der Hauptordner ist eins weiter oben (project)"
+sys.path.append(str(Path(__file__).parent.parent))
+
+from scripts.utils import load_config, setup_logger
+from scripts.prefetch import PrefetchPipeline
+from scripts.spectrogram_tiles import META_FILE, build_tiles
+
+# --- HAUPTFUNKTION ---
+
+def main():
+    config_path = "config/pipeline.yaml"
+    cfg = load_config(config_path)
+
+    logger = setup_logger("SpectrogramTiles", cfg["paths"]["pipeline_log"])
+    logger.info("--- START Spektrogramm-Tiles ---")
+
+    inventory_csv = Path(cfg["paths"]["inventory_csv"])
+    tiles_dir = Path(cfg["paths"]["tiles_dir"])
+    tcfg = cfg["tiles"]
+
+    if not inventory_csv.exists():
+        logger.critical("Inventory fehlt! Bitte erst '01_build_inventory.py' ausführen.")
+        sys.exit(1)
+
+    df_inv = pd.read_csv(inventory_csv)
+
+    # Nur lesbare Dateien, für die es noch keine fertige Pyramide gibt
+    readable = df_inv[df_inv["wav_readable"] == True]
+    todo = [
+        row for row in readable.to_dict("records")
+        if not (tiles_dir / row["file_id"] / META_FILE).exists()
+    ]
+    logger.info(f"{len(todo)} Dateien ohne Tiles gefunden.")
+
+    def stage(item):
+        # item.open() streamt die vorgelesenen Blöcke: Speicher = tiles.max_buffer_mb + io.prefetch_mb
+        return build_tiles(
+            item.open(), tiles_dir, item.row["file_id"],
+            hop_s=tcfg["hop_s"], n_fft=tcfg["n_fft"], n_mels=tcfg["n_mels"],
+            fmin=tcfg["fmin"], fmax=tcfg["fmax"], levels=tcfg["levels"],
+            db_range=tuple(tcfg["db_range"]), max_buffer_mb=tcfg["max_buffer_mb"],
+        )
+
+    pipe = PrefetchPipeline(prefetch_mb=cfg["io"]["prefetch_mb"], read_block_mb=cfg["io"]["read_block_mb"])
+    n_failed = 0
+    for item, meta, error in tqdm(pipe.run(todo, stage), total=len(todo), desc="Tiles", unit="file"):
+        if error is not None:
+            n_failed += 1
+            logger.error(f"{item.row['file_id']} Kritischer Fehler: Tiles nicht erstellt ({error})")
+
+    logger.info(f"I/O-Statistik: {pipe.stats.summary()}")
+    logger.info(f"--- ENDE Spektrogramm-Tiles ({n_failed} Fehler) ---")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+import sys
+from pathlib import Path
+
+# Wir sagen Python: "Der Hauptordner ist eins weiter oben (project)"
+sys.path.append(str(Path(__file__).parent.parent))
+
+from scripts.utils import load_config, setup_logger
+from scripts.merge_events import merge_detection_dir
+
+MODEL_NAMES = ["birdnet", "perch"]
+
+# --- HAUPTFUNKTION ---
+
+def main():
+    config_path = "config/pipeline.yaml"
+    cfg = load_config(config_path)
+
+    logger = setup_logger("MergeEvents", cfg["paths"]["pipeline_log"])
+    logger.info("--- START Events aus Detektionsfenstern ---")
+
+    detections_dir = Path(cfg["paths"]["detections_dir"])
+    max_gap_s = cfg["events"]["max_gap_s"]
+    # --all: alle Events neu bauen (z.B. nach Änderung von events.max_gap_s)
+    overwrite = "--all" in sys.argv[1:]
+
+    for name in MODEL_NAMES:
+        model_dir = detections_dir / name
+        if not model_dir.exists():
+            continue
+        written = merge_detection_dir(model_dir, max_gap_s=max_gap_s, overwrite=overwrite)
+        logger.info(f"{name}: {len(written)} Event-Tabellen geschrieben")
+
+    logger.info("--- ENDE Events ---")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+# scripts/activity_cube.py
+import json
+import os
+from pathlib import Path
+
+import pandas as pd
+
+CUBE_KEYS = ["recorder_id", "species_name", "date", "solar_slot", "birdnet_week48"]
+CUBE_VALUES = ["n_detections", "conf_sum"]
+INVENTORY_KEYS = ["file_id", "recorder_id", "date", "solar_slot", "birdnet_week48"]
+
+
+def _normalize_keys(df):
+    """
+    Einheitliche Typen für die Cube-Schlüssel, egal ob frisch aus dem Scan
+    (datetime.date, float-Woche) oder aus einer CSV (Strings).
+    """
+    df = df.copy()
+    df["recorder_id"] = df["recorder_id"].astype(str)
+    df["species_name"] = df["species_name"].astype(str)
+    df["date"] = df["date"].astype(str)
+    df["solar_slot"] = df["solar_slot"].fillna("no_slot").astype(str)
+    df["birdnet_week48"] = pd.to_numeric(df["birdnet_week48"], errors="coerce").fillna(0).astype(int)
+    return df
+
+
+def _table_from_columns(columns):
+    """Spalten-dict (aus Snapshot oder Log) -> indizierte Cube-Tabelle."""
+    df = pd.DataFrame(columns, columns=CUBE_KEYS + CUBE_VALUES)
+    df = _normalize_keys(df)
+    df["n_detections"] = df["n_detections"].astype(int)
+    df["conf_sum"] = df["conf_sum"].astype(float)
+    return df.set_index(CUBE_KEYS)
+
+
+def _json_default(obj):
+    """numpy-Skalare (int64, float64) für json.dumps."""
+    if hasattr(obj, "item"):
+        return obj.item()
+    raise TypeError(f"Nicht serialisierbar: {type(obj)}")
+
+
+class ActivityCube:
+    """
+    Vor-aggregierte Aktivität pro (recorder, species, date, solar_slot, week48).
+
+    Gespeichert werden Anzahl und Konfidenz-Summe. Neue Dateien werden nach
+    der Inference per update() addiert, ohne den Rest neu zu rechnen. Welche
+    file_ids schon enthalten sind, merkt sich der Cube, damit keine Datei
+    doppelt gezählt wird.
+
+    Persistenz: ein Snapshot (<name>.json, Zellen + file_ids + Sequenznummer
+    in einer Datei, atomar ersetzt) plus ein Append-only-Log
+    (<name>.log.jsonl). Jedes update() hängt genau eine Zeile mit Delta und
+    file_ids an, die Kosten hängen also nur von der neuen Datei ab. Alle
+    compact_every Updates (und bei save()) wird das Log in den Snapshot
+    übernommen. Eine abgebrochene letzte Log-Zeile wird beim Laden verworfen,
+    schon im Snapshot enthaltene Zeilen (Absturz beim Kompaktieren) übersprungen.
+
+    Beispiel:
+        cube = ActivityCube.load("outputs/activity_cube/birdnet.json")
+        cube.update(events, df_inv, file_ids=[file_id], conf_col="max_confidence")
+        cube.save()   # optional: Log kompaktieren
+        cube.slot_profile(species="Turdus merula_Eurasian Blackbird")
+    """
+
+    def __init__(self, path, compact_every=200):
+        """Öffnet den Cube unter path; vorhandener Snapshot und Log werden immer geladen."""
+        self.path = Path(path)
+        self.compact_every = compact_every
+        self._table = _table_from_columns({})
+        self._pending = []  # Deltas seit der letzten Abfrage (werden lazy addiert)
+        self.file_ids = set()
+        self.seq = 0  # letzte enthaltene Log-Sequenz
+        self._log_lines = 0
+        # Sonst würde ein neues update() eine schon vergebene Sequenz bekommen
+        self._read_state()
+
+    @property
+    def log_path(self):
+        return self.path.with_name(self.path.stem + ".log.jsonl")
+
+    @property
+    def table(self):
+        """Cube-Tabelle (MultiIndex CUBE_KEYS); offene Deltas werden hier addiert."""
+        if self._pending:
+            delta = pd.concat(self._pending).groupby(level=CUBE_KEYS).sum()
+            table = self._table.add(delta, fill_value=0)
+            table["n_detections"] = table["n_detections"].astype(int)
+            self._table = table
+            self._pending = []
+        return self._table
+
+    # --- LADEN / SPEICHERN ---
+    @classmethod
+    def load(cls, path, compact_every=200):
+        """Lädt Snapshot + Log eines gespeicherten Cubes oder startet einen leeren."""
+        return cls(path, compact_every=compact_every)
+
+    def _read_state(self):
+        """Snapshot lesen und das Log darüber abspielen."""
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            self._table = _table_from_columns(state["table"])
+            self.file_ids = set(state["file_ids"])
+            self.seq = state["seq"]
+
+        if self.log_path.exists():
+            valid_bytes = 0
+            with open(self.log_path, "rb") as f:
+                for line in f:
+                    try:
+                        if not line.endswith(b"\n"):
+                            raise ValueError("unvollständige Zeile")
+                        record = json.loads(line)
+                    except ValueError:
+                        break  # abgebrochener Schreibvorgang am Ende
+                    valid_bytes += len(line)
+                    self._log_lines += 1
+                    if record["seq"] <= self.seq:
+                        continue  # steckt schon im Snapshot
+                    self._apply(record)
+            if valid_bytes < self.log_path.stat().st_size:
+                with open(self.log_path, "r+b") as f:
+                    f.truncate(valid_bytes)
+
+    def save(self):
+        """
+        Kompaktiert: Snapshot mit Zellen, file_ids und Sequenz atomar schreiben,
+        danach das Log leeren.
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        state = {
+            "seq": self.seq,
+            "file_ids": sorted(self.file_ids),
+            "table": self.table.reset_index().to_dict("list"),
+        }
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False, default=_json_default)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        # Absturz genau hier ist harmlos: Log-Zeilen mit seq <= Snapshot werden übersprungen
+        open(self.log_path, "w").close()
+        self._log_lines = 0
+
+    def _append_log(self, record):
+        """Eine Zeile ans Log hängen und auf die Platte synchronisieren."""
+        self.log_path.parent.mkdir(parents=True, exist_ok=True)
+        line = json.dumps(record, ensure_ascii=False, default=_json_default) + "\n"
+        with open(self.log_path, "a", encoding="utf-8") as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+        self._log_lines += 1
+
+    def _apply(self, record):
+        """Log-Eintrag in den Speicher übernehmen."""
+        if record["delta"]["species_name"]:
+            self._pending.append(_table_from_columns(record["delta"]))
+        self.file_ids |= set(record["file_ids"])
+        self.seq = record["seq"]
+
+    # --- INKREMENTELLES UPDATE ---
+    def update(self, detections, inventory, file_ids=None, conf_col="confidence"):
+        """
+        Addiert die Detektionen neuer Dateien in den Cube und schreibt das
+        Delta sofort ins Log (kein extra save() nötig).
+
+        Args:
+            detections: Tabelle mit file_id, species_name und conf_col
+                (Fenster oder gemergte Events, siehe merge_events).
+            inventory: Inventory-Zeilen mit INVENTORY_KEYS (mind. die der neuen Dateien).
+            file_ids: Dateien, die als verarbeitet gelten (auch ohne Detektionen).
+                Default: alle file_ids in detections.
+            conf_col: Spalte mit der Konfidenz.
+
+        Returns:
+            Anzahl der neu aufgenommenen Dateien.
+        """
+        if file_ids is None:
+            file_ids = detections["file_id"].unique()
+        new_ids = {str(f) for f in file_ids} - self.file_ids
+        if not new_ids:
+            return 0
+
+        det = detections[detections["file_id"].astype(str).isin(new_ids)]
+        delta = pd.DataFrame(columns=CUBE_KEYS + CUBE_VALUES)
+        if not det.empty:
+            inv = inventory[INVENTORY_KEYS].drop_duplicates("file_id")
+            joined = det[["file_id", "species_name", conf_col]].merge(inv, on="file_id", how="inner")
+            joined = _normalize_keys(joined)
+
+            # Nur die betroffenen Zellen ändern sich, der Rest bleibt stehen
+            delta = joined.groupby(CUBE_KEYS).agg(
+                n_detections=(conf_col, "size"),
+                conf_sum=(conf_col, "sum"),
+            ).reset_index()
+
+        record = {"seq": self.seq + 1, "file_ids": sorted(new_ids), "delta": delta.to_dict("list")}
+        # Erst ins Log (Write-ahead), dann in den Speicher
+        self._append_log(record)
+        self._apply(record)
+
+        if self.compact_every and self._log_lines >= self.compact_every:
+            self.save()
+        return len(new_ids)
+
+    # --- ABFRAGEN ---
+    def query(self, **filters):
+        """
+        Zellen des Cubes, gefiltert nach beliebigen Schlüsseln, z.B.
+        query(species_name="Erithacus rubecula_European Robin", solar_slot="sunrise_0").
+        Listen sind als Filter erlaubt.
+        """
+        df = self.table.reset_index()
+        for key, value in filters.items():
+            if key not in CUBE_KEYS:
+                raise KeyError(f"Unbekannter Cube-Schlüssel: {key}")
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            df = df[df[key].isin(values)]
+        df = df.copy()
+        df["mean_confidence"] = df["conf_sum"] / df["n_detections"]
+        return df.reset_index(drop=True)
+
+    def slot_profile(self, by="species_name", **filters):
+        """
+        Aktivität je solar_slot als Pivot (Zeilen = by, Spalten = solar_slot).
+        """
+        df = self.query(**filters)
+        return df.pivot_table(
+            index=by, columns="solar_slot", values="n_detections", aggfunc="sum", fill_value=0
+        )
@@ -0,0 +1,132 @@
+# scripts/checkpoint_writer.py
+import json
+import os
+from pathlib import Path
+
+import pandas as pd
+
+
+class StreamingCsvWriter:
+    """
+    Schreibt Zeilen batchweise in eine temporäre Datei (<ziel>.partial)
+    statt alles im RAM zu sammeln. Erst finalize() ersetzt die Zieldatei
+    atomar per os.replace.
+
+    Die Spalten sind fest vorgegeben, damit alle Batches dasselbe Schema haben
+    (fehlende Werte bleiben leer).
+    """
+
+    def __init__(self, target, columns):
+        self.target = Path(target)
+        self.partial = self.target.with_name(self.target.name + ".partial")
+        self.columns = list(columns)
+        self.rows = []
+        self.n_rows = 0  # bereits in .partial geschriebene Zeilen
+
+    def append(self, row: dict):
+        self.rows.append(row)
+
+    def flush(self):
+        """Hängt gepufferte Zeilen an .partial an und synchronisiert auf die Platte."""
+        if not self.rows:
+            return
+        self.partial.parent.mkdir(parents=True, exist_ok=True)
+        write_header = not self.partial.exists() or self.partial.stat().st_size == 0
+
+        df = pd.DataFrame(self.rows).reindex(columns=self.columns)
+        with open(self.partial, "a", encoding="utf-8", newline="") as f:
+            df.to_csv(f, index=False, header=write_header)
+            f.flush()
+            os.fsync(f.fileno())
+
+        self.n_rows += len(self.rows)
+        self.rows = []
+
+    def size(self):
+        return self.partial.stat().st_size if self.partial.exists() else 0
+
+    def truncate(self, size, n_rows):
+        """
+        Setzt .partial auf einen Checkpoint-Stand zurück. Alles, was nach dem
+        letzten Checkpoint geschrieben wurde, wird verworfen.
+        """
+        self.rows = []
+        self.n_rows = n_rows
+        if self.partial.exists():
+            with open(self.partial, "r+b") as f:
+                f.truncate(size)
+
+    def discard(self):
+        self.rows = []
+        self.n_rows = 0
+        self.partial.unlink(missing_ok=True)
+
+    def finalize(self):
+        """Restliche Zeilen schreiben und .partial atomar an die Zielstelle verschieben."""
+        self.flush()
+        if not self.partial.exists() and self.n_rows > 0 and self.target.exists():
+            # Schon verschoben (Absturz mitten in finish) -> nichts zu tun
+            return
+        if not self.partial.exists():
+            # Keine Zeilen -> trotzdem gültige CSV mit Header
+            self.partial.parent.mkdir(parents=True, exist_ok=True)
+            pd.DataFrame(columns=self.columns).to_csv(self.partial, index=False)
+        os.replace(self.partial, self.target)
+
+
+class ScanCheckpoint:
+    """
+    Merkt sich, welche Dateien fertig gescannt sind und wie groß die
+    .partial-Dateien der Writer zu diesem Zeitpunkt waren.
+
+    Nach einem Absturz setzt resume() die Writer auf den letzten Checkpoint
+    zurück und liefert die fertigen Schlüssel, damit der Scan dort weitermacht.
+
+    Beispiel:
+        ckpt = ScanCheckpoint("outputs/inventory.csv.checkpoint.json", {"inventory": w1, "anomalies": w2})
+        done = ckpt.resume()
+        ...
+        ckpt.commit(done)   # alle N Dateien
+        ckpt.finish()       # am Ende: atomar finalisieren
+    """
+
+    def __init__(self, path, writers: dict):
+        self.path = Path(path)
+        self.writers = writers
+
+    def resume(self):
+        """Returns: Menge der bereits fertigen Schlüssel (leer bei frischem Start)."""
+        if not self.path.exists():
+            # Frischer Start: Reste eines alten Laufs ohne Checkpoint verwerfen
+            for w in self.writers.values():
+                w.discard()
+            return set()
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        for name, w in self.writers.items():
+            ws = state["writers"].get(name, {"size": 0, "n_rows": 0})
+            w.truncate(ws["size"], ws["n_rows"])
+        return set(state["done"])
+
+    def commit(self, done):
+        """Alle Writer flushen und den Stand atomar speichern."""
+        for w in self.writers.values():
+            w.flush()
+        state = {
+            "done": sorted(done),
+            "writers": {name: {"size": w.size(), "n_rows": w.n_rows} for name, w in self.writers.items()},
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+    def finish(self):
+        """Writer finalisieren (atomares Umbenennen) und Checkpoint löschen."""
+        for w in self.writers.values():
+            w.finalize()
+        self.path.unlink(missing_ok=True)
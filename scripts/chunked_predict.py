@@ -0,0 +1,236 @@
+# scripts/chunked_predict.py
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import soundfile as sf
+
+# Spalten der normalisierten Detektionstabelle (Zeiten immer in Sekunden, absolut zur Datei)
+DETECTION_COLUMNS = ["file_id", "start_s", "end_s", "species_name", "confidence"]
+
+# int16-Chunk des Modell-Adapters pro float32-Sample der Quelle (2 statt 4 Bytes)
+PCM_RATIO = 0.5
+PCM_BLOCK = 65536  # Samples pro Schritt beim Wandeln nach int16 (kleiner Zwischenpuffer)
+
+
+# --- HELFER: Zeitspalten ---
+def to_seconds(col: pd.Series) -> pd.Series:
+    """
+    Wandelt eine Zeitspalte in float-Sekunden um.
+    BirdNET liefert 'HH:MM:SS.xx'-Strings, Perch bereits Zahlen.
+    """
+    if pd.api.types.is_numeric_dtype(col):
+        return col.astype(float)
+    return pd.to_timedelta(col.astype(str)).dt.total_seconds()
+
+
+def normalize_predictions(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Bringt ein predictions.to_dataframe() von BirdNET/Perch in die Form
+    start_s, end_s, species_name, confidence.
+    """
+    return pd.DataFrame({
+        "start_s": to_seconds(df["start_time"]),
+        "end_s": to_seconds(df["end_time"]),
+        "species_name": df["species_name"].astype(str),
+        "confidence": pd.to_numeric(df["confidence"], errors="coerce"),
+    })
+
+
+# --- PUFFER-PLANUNG ---
+def plan_chunk_frames(samplerate, channels, hop_s, overlap_s, max_buffer_mb):
+    """
+    Berechnet, wie viele Frames pro Chunk gelesen werden dürfen.
+
+    Der Audio-Puffer (float32) umfasst chunk_frames + overlap_frames und
+    bleibt damit unter max_buffer_mb. chunk_frames ist ein Vielfaches des
+    Fenster-Hops, damit das Fensterraster über Chunkgrenzen hinweg exakt
+    weiterläuft.
+
+    Returns:
+        (chunk_frames, overlap_frames)
+    """
+    hop_frames = round(hop_s * samplerate)
+    overlap_frames = round(overlap_s * samplerate)
+    if hop_frames <= 0:
+        raise ValueError(f"Hop muss > 0 sein (hop_s={hop_s})")
+
+    bytes_per_frame = 4 * channels
+    budget_frames = int(max_buffer_mb * 1024 * 1024 // bytes_per_frame)
+    chunk_frames = ((budget_frames - overlap_frames) // hop_frames) * hop_frames
+    if chunk_frames <= 0:
+        raise ValueError(
+            f"max_buffer_mb={max_buffer_mb} ist zu klein für ein Fenster "
+            f"(samplerate={samplerate}, channels={channels})"
+        )
+    return chunk_frames, overlap_frames
+
+
+# --- CHUNK-ITERATOR ---
+def iter_audio_chunks(f: sf.SoundFile, chunk_frames: int, overlap_frames: int):
+    """
+    Liest eine offene Audiodatei in Chunks mit festem Puffer.
+
+    Jeder Chunk beginnt bei start_frame und enthält chunk_frames neue Frames
+    plus overlap_frames Frames des nächsten Chunks. Die Überlappung wird im
+    Puffer nach vorne kopiert statt erneut von der Platte gelesen.
+
+    Yields:
+        (start_frame, block, is_last) - block ist eine View auf den Puffer
+        (frames x channels) und nur bis zum nächsten Schritt gültig.
+    """
+    total = f.frames
+    buf = np.empty((chunk_frames + overlap_frames, f.channels), dtype="float32")
+    start = 0
+    carry = 0
+
+    while start < total:
+        n_block = min(chunk_frames + overlap_frames, total - start)
+        if n_block > carry:
+            f.read(dtype="float32", always_2d=True, out=buf[carry:n_block])
+        block = buf[:n_block]
+        is_last = start + chunk_frames >= total
+
+        yield start, block, is_last
+
+        if is_last:
+            break
+        # Überlappung für den nächsten Chunk nach vorne schieben
+        carry = n_block - chunk_frames
+        buf[:carry] = buf[chunk_frames:n_block]
+        start += chunk_frames
+
+
+def keep_chunk_windows(df: pd.DataFrame, offset_s: float, chunk_s: float, is_last: bool) -> pd.DataFrame:
+    """
+    Verschiebt die Chunk-relativen Fenster auf absolute Zeiten und verwirft
+    Fenster, die im nächsten Chunk vollständig enthalten sind (keine Duplikate).
+    """
+    if not is_last:
+        df = df[df["start_s"] < chunk_s - 1e-6]
+    df = df.copy()
+    df["start_s"] += offset_s
+    df["end_s"] += offset_s
+    return df
+
+
+# --- MODELL-ADAPTER ---
+def to_pcm16(samples, out):
+    """
+    float32 [-1, 1] -> int16 in den vorallokierten Puffer out.
+
+    Begrenzen und Skalieren laufen blockweise über einen kleinen Zwischenpuffer,
+    damit kein zweites Chunk-großes float32-Array entsteht.
+    """
+    scratch = np.empty((min(len(samples), PCM_BLOCK),) + samples.shape[1:], dtype="float32")
+    for i in range(0, len(samples), PCM_BLOCK):
+        part = samples[i:i + PCM_BLOCK]
+        tmp = scratch[:len(part)]
+        np.clip(part, -1.0, 1.0, out=tmp)
+        np.multiply(tmp, 32767, out=out[i:i + len(part)], casting="unsafe")
+    return out
+
+
+def make_model_predictor(model, overlap_s, tmp_dir=None, **predict_kwargs):
+    """
+    Baut aus einem geladenen BirdNET/Perch-Modell eine Funktion
+    predict_fn(samples, samplerate) -> DataFrame.
+
+    Die birdnet-Library akzeptiert nur Pfade, daher wird jeder Chunk kurz als
+    temporäre WAV (PCM_16, halb so groß wie float32) in tmp_dir geschrieben und
+    vom Modell wieder gelesen. Die Größe ist durch den Chunk begrenzt; tmp_dir
+    sollte auf einer lokalen SSD oder RAM-Disk liegen. Der int16-Puffer wird
+    einmal angelegt und wiederverwendet (im Budget als PCM_RATIO enthalten).
+
+    overlap_s wird als overlap_duration_s an predict() durchgereicht und an der
+    Funktion vermerkt, damit das Chunk-Raster dieselbe Überlappung nutzt.
+    """
+    if predict_kwargs.setdefault("overlap_duration_s", overlap_s) != overlap_s:
+        raise ValueError(
+            f"overlap_duration_s={predict_kwargs['overlap_duration_s']} passt nicht zu overlap_s={overlap_s}"
+        )
+
+    state = {"pcm": None}
+
+    def predict_fn(samples, samplerate):
+        pcm = state["pcm"]
+        if pcm is None or len(pcm) < len(samples) or pcm.shape[1:] != samples.shape[1:]:
+            pcm = state["pcm"] = np.empty(samples.shape, dtype="int16")
+        pcm = pcm[:len(samples)]
+
+        with tempfile.NamedTemporaryFile(suffix=".wav", dir=tmp_dir, delete=False) as tmp:
+            tmp_path = Path(tmp.name)
+        try:
+            # Selbst nach int16 wandeln: libsndfile würde Werte > 1.0 nicht begrenzen
+            to_pcm16(samples, pcm)
+            sf.write(str(tmp_path), pcm, samplerate, subtype="PCM_16")
+            result = model.predict(str(tmp_path), **predict_kwargs)
+            return normalize_predictions(result.to_dataframe())
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+    predict_fn.overlap_s = overlap_s
+    return predict_fn
+
+
+def check_overlap(predict_fn, overlap_s):
+    """
+    Prüft, ob die Überlappung des Modells (siehe make_model_predictor) zum
+    Chunk-Raster passt. Sonst liegen die Chunk-Grenzen nicht auf den Fenstern
+    des Modells und Fenster gehen verloren oder werden doppelt gezählt.
+    """
+    model_overlap = getattr(predict_fn, "overlap_s", None)
+    if model_overlap is not None and abs(model_overlap - overlap_s) > 1e-9:
+        raise ValueError(
+            f"Modell-Überlappung ({model_overlap} s) weicht vom Chunk-Raster ({overlap_s} s) ab"
+        )
+
+
+# --- HAUPTFUNKTION ---
+def predict_chunked(source, predict_fn, window_s=3.0, overlap_s=2.0, max_buffer_mb=256, file_id=None):
+    """
+    Chunked Prediction mit begrenztem Speicher.
+
+    Die Datei wird in Chunks gestreamt, jeder Chunk an predict_fn übergeben
+    und die Ergebnisse zu einer Tabelle mit absoluten Zeiten zusammengesetzt.
+
+    Args:
+        source: Pfad oder file-like Objekt (z.B. BytesIO) der Audiodatei.
+        predict_fn: Funktion (samples, samplerate) -> DataFrame mit
+            start_s, end_s, species_name, confidence (relativ zum Chunk).
+        window_s: Fensterlänge des Modells (BirdNET 3.0 s, Perch 5.0 s).
+        overlap_s: Überlappung der Fenster (wie overlap_duration_s bei predict).
+        max_buffer_mb: Obergrenze für die Audio-Puffer pro Worker (Quelle plus
+            int16-Chunk des Modell-Adapters; Speicher des Modells selbst kommt dazu).
+        file_id: Wird in die Ergebnistabelle geschrieben (Default: Dateiname ohne Endung).
+
+    Returns:
+        DataFrame mit DETECTION_COLUMNS.
+    """
+    if file_id is None:
+        file_id = Path(str(getattr(source, "name", source))).stem
+
+    check_overlap(predict_fn, overlap_s)
+    hop_s = window_s - overlap_s
+    parts = []
+
+    with sf.SoundFile(source) as f:
+        sr = f.samplerate
+        chunk_frames, overlap_frames = plan_chunk_frames(
+            sr, f.channels, hop_s, overlap_s, max_buffer_mb / (1 + PCM_RATIO)
+        )
+        chunk_s = chunk_frames / sr
+
+        for start_frame, block, is_last in iter_audio_chunks(f, chunk_frames, overlap_frames):
+            df_chunk = predict_fn(block, sr)
+            if df_chunk is None or df_chunk.empty:
+                continue
+            parts.append(keep_chunk_windows(df_chunk, start_frame / sr, chunk_s, is_last))
+
+    if not parts:
+        return pd.DataFrame(columns=DETECTION_COLUMNS)
+
+    out = pd.concat(parts, ignore_index=True)
+    out.insert(0, "file_id", file_id)
+    return out[DETECTION_COLUMNS]
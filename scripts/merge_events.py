@@ -0,0 +1,119 @@
+# scripts/merge_events.py
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+EVENT_COLUMNS = [
+    "file_id", "species_name", "start_s", "end_s",
+    "max_confidence", "mean_confidence", "n_windows",
+]
+# Events liegen neben den Fenster-CSVs: <file_id>.csv -> <file_id>.events.csv
+EVENTS_SUFFIX = ".events.csv"
+
+
+def merge_detection_windows(df: pd.DataFrame, max_gap_s: float = 0.0) -> pd.DataFrame:
+    """
+    Fasst überlappende oder aneinandergrenzende Detektionsfenster je
+    (file_id, species_name) zu Events zusammen.
+
+    Beispiel (1 s Hop, 3 s Fenster): 00:00:01-00:00:04 und 00:00:03-00:00:06
+    derselben Art werden zu einem Event 00:00:01-00:00:06.
+
+    Komplett vektorisiert: einmal sortieren, Event-Grenzen als Bool-Maske
+    bestimmen (Run-Length), dann mit np.*.reduceat aggregieren.
+
+    Args:
+        df: Detektionstabelle mit file_id, species_name, start_s, end_s, confidence.
+        max_gap_s: Erlaubte Lücke zwischen zwei Fenstern, die noch zusammengefasst wird.
+
+    Returns:
+        DataFrame mit EVENT_COLUMNS (ein Event pro Zeile).
+    """
+    if df.empty:
+        return pd.DataFrame(columns=EVENT_COLUMNS)
+
+    # 1. Gruppen als Integer-Codes (schneller als Strings vergleichen)
+    file_codes, file_uniques = pd.factorize(df["file_id"], sort=True)
+    species_codes, species_uniques = pd.factorize(df["species_name"], sort=True)
+
+    start = df["start_s"].to_numpy(dtype="float64")
+    end = df["end_s"].to_numpy(dtype="float64")
+    conf = df["confidence"].to_numpy(dtype="float64")
+
+    # 2. Sortieren nach (file, species, start)
+    order = np.lexsort((start, species_codes, file_codes))
+    file_codes = file_codes[order]
+    species_codes = species_codes[order]
+    start = start[order]
+    end = end[order]
+    conf = conf[order]
+
+    # 3. Gruppenwechsel
+    new_group = np.ones(len(start), dtype=bool)
+    new_group[1:] = (file_codes[1:] != file_codes[:-1]) | (species_codes[1:] != species_codes[:-1])
+
+    # 4. Laufendes Maximum von end_s innerhalb der Gruppe.
+    # Trick: Gruppen-Offset addieren, damit np.maximum.accumulate an
+    # Gruppengrenzen nicht "überläuft" (Zeiten sind >= 0 und < span).
+    group_id = np.cumsum(new_group) - 1
+    span = end.max() - min(start.min(), 0.0) + max_gap_s + 1.0
+    shifted = end + group_id * span
+    running_end = np.maximum.accumulate(shifted) - group_id * span
+
+    # 5. Neues Event, wenn Gruppe wechselt oder Lücke zum bisherigen Ende zu groß
+    new_event = new_group.copy()
+    new_event[1:] |= start[1:] > running_end[:-1] + max_gap_s
+
+    # 6. Run-Length-Aggregation
+    idx = np.flatnonzero(new_event)
+    n_windows = np.diff(np.append(idx, len(start)))
+
+    return pd.DataFrame({
+        "file_id": file_uniques[file_codes[idx]],
+        "species_name": species_uniques[species_codes[idx]],
+        "start_s": start[idx],
+        "end_s": np.maximum.reduceat(end, idx),
+        "max_confidence": np.maximum.reduceat(conf, idx),
+        "mean_confidence": np.add.reduceat(conf, idx) / n_windows,
+        "n_windows": n_windows,
+    })
+
+
+# --- PERSISTENZ ---
+def events_path(window_csv):
+    """Pfad der Event-Tabelle zu einer Fenster-CSV (<file_id>.csv)."""
+    window_csv = Path(window_csv)
+    return window_csv.with_name(window_csv.stem + EVENTS_SUFFIX)
+
+
+def write_events(events, path):
+    """Schreibt eine Event-Tabelle (erst .tmp, dann atomar ersetzen)."""
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    events.reindex(columns=EVENT_COLUMNS).to_csv(tmp, index=False)
+    os.replace(tmp, path)
+
+
+def merge_detection_dir(det_dir, max_gap_s=0.0, overwrite=False):
+    """
+    Erzeugt für jede Fenster-CSV in det_dir die Event-Tabelle daneben.
+
+    Übersprungen werden Dateien, deren Events neuer als die Fenster sind
+    (außer overwrite=True, z.B. nach Änderung von max_gap_s).
+
+    Returns:
+        Liste der geschriebenen Event-Pfade.
+    """
+    written = []
+    for window_csv in sorted(Path(det_dir).glob("*.csv")):
+        if window_csv.name.endswith(EVENTS_SUFFIX):
+            continue
+        target = events_path(window_csv)
+        if not overwrite and target.exists() and target.stat().st_mtime >= window_csv.stat().st_mtime:
+            continue
+        df = pd.read_csv(window_csv, dtype={"file_id": str})
+        write_events(merge_detection_windows(df, max_gap_s), target)
+        written.append(target)
+    return written
@@ -0,0 +1,152 @@
+# scripts/multi_model.py
+import math
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+import pandas as pd
+import soundfile as sf
+from scipy.signal import resample_poly
+
+from scripts.chunked_predict import (
+    DETECTION_COLUMNS,
+    PCM_RATIO,
+    check_overlap,
+    iter_audio_chunks,
+    keep_chunk_windows,
+    plan_chunk_frames,
+)
+
+
+@dataclass
+class ModelSpec:
+    """
+    Beschreibt ein Modell für den gemeinsamen Decode-Durchlauf.
+
+    name: z.B. 'birdnet' oder 'perch' (Status-Spalte ist f"{name}_status")
+    samplerate: Samplerate, die das Modell erwartet (BirdNET 48 kHz, Perch 32 kHz)
+    window_s / overlap_s: Fensterlänge und Überlappung wie bei predict()
+    predict_fn: (samples, samplerate) -> DataFrame (siehe make_model_predictor)
+    """
+    name: str
+    samplerate: int
+    window_s: float
+    overlap_s: float
+    predict_fn: Callable
+
+    @property
+    def hop_s(self):
+        return self.window_s - self.overlap_s
+
+
+def common_hop_s(specs):
+    """
+    Kleinster Hop, der für alle Modelle ein Vielfaches ihres eigenen Hops ist
+    (auf ms gerundet). BirdNET 1 s + Perch 3 s -> 3 s.
+    """
+    return math.lcm(*[round(s.hop_s * 1000) for s in specs]) / 1000.0
+
+
+def plan_multi_chunks(samplerate, channels, specs, max_buffer_mb):
+    """
+    Chunk-Planung für den gemeinsamen Durchlauf: das Puffer-Budget wird auf
+    Quelle (alle Kanäle), Mono-Mix, die Resampling-Puffer (einer pro
+    Samplerate) und die int16-Chunks der Modell-Adapter (einer pro Modell)
+    aufgeteilt.
+
+    Hängt nur von Samplerate, Kanälen und Konfiguration ab und kann daher vor
+    der Inference einmal geprüft werden.
+
+    Raises:
+        ValueError: wenn max_buffer_mb für kein einziges Fenster reicht.
+
+    Returns:
+        (chunk_frames, overlap_frames) in Frames der Quelle.
+    """
+    rates = {s.samplerate for s in specs}
+    ratio = (
+        channels + 1
+        + sum(r / samplerate for r in rates)
+        + sum(PCM_RATIO * s.samplerate / samplerate for s in specs)
+    )
+    overlap_s = max(s.overlap_s for s in specs)
+    return plan_chunk_frames(
+        samplerate, channels, common_hop_s(specs), overlap_s, max_buffer_mb * channels / ratio
+    )
+
+
+def predict_multi_chunked(source, specs, max_buffer_mb=256, file_id=None):
+    """
+    Dekodiert eine Audiodatei genau einmal und füttert alle Modelle.
+
+    Jeder Chunk wird einmal gelesen, auf Mono gemischt und pro benötigter
+    Samplerate einmal resampled. Modelle mit derselben Samplerate teilen sich
+    den Puffer. Die Chunk-Logik (Überlappung, absolute Offsets, keine
+    doppelten Fenster) ist dieselbe wie in predict_chunked.
+
+    Fällt ein Modell aus, läuft der Durchlauf für die anderen weiter.
+
+    Args:
+        source: Pfad oder file-like Objekt der Audiodatei.
+        specs: Liste von ModelSpec.
+        max_buffer_mb: Obergrenze für Quell- und Resampling-Puffer zusammen.
+        file_id: Wird in die Ergebnistabellen geschrieben.
+
+    Returns:
+        (results, errors) - dicts name -> DataFrame bzw. name -> Exception.
+    """
+    if file_id is None:
+        file_id = Path(str(getattr(source, "name", source))).stem
+
+    parts = {s.name: [] for s in specs}
+    errors = {}
+    for spec in specs:
+        check_overlap(spec.predict_fn, spec.overlap_s)
+
+    with sf.SoundFile(source) as f:
+        sr = f.samplerate
+        rates = sorted({s.samplerate for s in specs})
+
+        chunk_frames, overlap_frames = plan_multi_chunks(sr, f.channels, specs, max_buffer_mb)
+        chunk_s = chunk_frames / sr
+
+        for start_frame, block, is_last in iter_audio_chunks(f, chunk_frames, overlap_frames):
+            mono = block.mean(axis=1) if block.shape[1] > 1 else block[:, 0]
+
+            # Einmal pro Samplerate resamplen
+            resampled = {}
+            for r in rates:
+                if r == sr:
+                    resampled[r] = mono
+                else:
+                    g = math.gcd(r, sr)
+                    resampled[r] = resample_poly(mono, r // g, sr // g).astype("float32", copy=False)
+
+            for spec in specs:
+                if spec.name in errors:
+                    continue
+                samples = resampled[spec.samplerate]
+                if not is_last:
+                    # Nur so viel Überlappung, wie dieses Modell braucht
+                    n = round((chunk_s + spec.overlap_s) * spec.samplerate)
+                    samples = samples[:n]
+                try:
+                    df_chunk = spec.predict_fn(samples, spec.samplerate)
+                except Exception as e:
+                    errors[spec.name] = e
+                    continue
+                if df_chunk is None or df_chunk.empty:
+                    continue
+                parts[spec.name].append(keep_chunk_windows(df_chunk, start_frame / sr, chunk_s, is_last))
+
+    results = {}
+    for spec in specs:
+        if spec.name in errors:
+            continue
+        if parts[spec.name]:
+            out = pd.concat(parts[spec.name], ignore_index=True)
+            out.insert(0, "file_id", file_id)
+            results[spec.name] = out[DETECTION_COLUMNS]
+        else:
+            results[spec.name] = pd.DataFrame(columns=DETECTION_COLUMNS)
+    return results, errors
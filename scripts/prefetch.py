@@ -0,0 +1,344 @@
+# scripts/prefetch.py
+import io
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable
+
+MB = 1024 * 1024
+HEAD_BYTES = 64 * 1024  # Dateianfang (Header), der für Rück-Seeks im RAM bleibt
+
+
+class BlockStreamReader(io.RawIOBase):
+    """
+    Streaming-Reader über die vorgelesenen Blöcke einer Datei (für soundfile).
+
+    Die Blöcke kommen der Reihe nach aus der Queue des Lese-Threads und werden
+    freigegeben, sobald der Reader über sie hinaus ist. Im RAM liegt also nur
+    der aktuelle Block plus der Dateianfang (Header). seek() ist virtuell:
+    Vorwärts-Seeks überspringen Blöcke, Rück-Seeks in den Header sind frei.
+    Nur ein Rück-Seek mitten in die Datei öffnet sie direkt (selten, z.B.
+    Chunks hinter den Audiodaten).
+    """
+
+    def __init__(self, pipe, q, path, size):
+        self._pipe = pipe
+        self._q = q
+        self.path = path
+        self.size = size
+        self.wait_s = 0.0  # Zeit, die auf den Lese-Thread gewartet wurde
+
+        self._pos = 0
+        self._head = b""
+        self._block = None
+        self._block_start = 0
+        self._next_start = 0  # Offset des nächsten Blocks aus der Queue
+        self._done = False
+        self._error = None
+        self._fallback = None
+
+    # --- file-like API ---
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self._pos + offset
+        elif whence == io.SEEK_END:
+            pos = self.size + offset
+        else:
+            raise ValueError(f"Ungültiges whence: {whence}")
+        self._pos = max(0, pos)
+        return self._pos
+
+    def readinto(self, b):
+        view = memoryview(b).cast("B")
+        filled = 0
+        # Voll auffüllen: libsndfile wertet kurze Reads als Dateiende
+        while filled < len(view) and self._pos < self.size:
+            n = self._read_some(view[filled:])
+            if not n:
+                break
+            filled += n
+            self._pos += n
+        return filled
+
+    # --- intern ---
+    def _read_some(self, view):
+        pos = self._pos
+        if self._fallback is not None:
+            self._fallback.seek(pos)
+            return self._fallback.readinto(view)
+        if pos < len(self._head):
+            n = min(len(view), len(self._head) - pos)
+            view[:n] = self._head[pos:pos + n]
+            return n
+        if pos < self._block_start or (self._block is None and pos < self._next_start):
+            # Rück-Seek hinter den Header: direkt von der Platte lesen
+            self._fallback = open(self.path, "rb")
+            return self._read_some(view)
+
+        while self._block is None or pos >= self._block_start + len(self._block):
+            if not self._advance():
+                if self._error is not None:
+                    raise OSError(f"Lesefehler in {self.path}: {self._error}")
+                return 0
+        off = pos - self._block_start
+        n = min(len(view), len(self._block) - off)
+        view[:n] = self._block[off:off + n]
+        return n
+
+    def _drop_block(self):
+        if self._block is not None:
+            self._pipe._release(len(self._block))
+            self._block = None
+
+    def _advance(self):
+        """Aktuellen Block freigeben und den nächsten holen. False am Dateiende."""
+        self._drop_block()
+        if self._done:
+            return False
+        t0 = time.perf_counter()
+        kind, payload = self._q.get()
+        self.wait_s += time.perf_counter() - t0
+        if kind == "end":
+            self._done = True
+            self._error = payload
+            return False
+        if self._next_start == 0:
+            self._head = bytes(payload[:HEAD_BYTES])
+        self._block = memoryview(payload)
+        self._block_start = self._next_start
+        self._next_start += len(payload)
+        return True
+
+    def drain(self):
+        """Restliche Blöcke dieser Datei verwerfen (Budget zurückgeben)."""
+        while self._advance():
+            pass
+        self._head = b""
+        if self._fallback is not None:
+            self._fallback.close()
+            self._fallback = None
+
+
+@dataclass
+class PrefetchedFile:
+    """
+    Inventory-Zeile plus Streaming-Zugriff auf die vorgelesenen Blöcke der Datei.
+    """
+    row: dict
+    error: Exception = None
+    reader: BlockStreamReader = field(default=None, repr=False)
+
+    def open(self):
+        """File-like Objekt für soundfile (sf.SoundFile / sf.info / predict_chunked)."""
+        if self.reader is None:
+            raise ValueError(f"{self.row.get('file_id')}: nur innerhalb der Stage lesbar")
+        self.reader.seek(0)
+        return self.reader
+
+
+@dataclass
+class PrefetchStats:
+    """
+    Zeiten der beiden Seiten der Pipeline.
+
+    producer_wait_s: Leser wartet, weil der Puffer voll ist (Backpressure)
+    consumer_wait_s: Compute wartet, weil noch nichts gelesen ist
+    """
+    files: int = 0
+    bytes_read: int = 0
+    read_s: float = 0.0
+    compute_s: float = 0.0
+    producer_wait_s: float = 0.0
+    consumer_wait_s: float = 0.0
+    wall_s: float = 0.0
+    peak_buffered_mb: float = 0.0
+
+    @property
+    def bottleneck(self):
+        """
+        'io', wenn das Lesen länger dauert als das Rechnen, sonst 'compute'.
+
+        Die Wartezeiten entscheiden nur bei etwa gleichen Zeiten (±10 %): allein
+        sind sie irreführend, z.B. zählt das Warten auf die erste Datei als I/O,
+        auch wenn der Puffer danach nie voll wird.
+        """
+        if abs(self.read_s - self.compute_s) > 0.1 * max(self.read_s, self.compute_s):
+            return "io" if self.read_s > self.compute_s else "compute"
+        return "io" if self.consumer_wait_s > self.producer_wait_s else "compute"
+
+    def summary(self):
+        mb_s = self.bytes_read / MB / self.read_s if self.read_s > 0 else 0.0
+        return (
+            f"{self.files} Dateien, {self.bytes_read / MB:.0f} MB gelesen ({mb_s:.0f} MB/s) | "
+            f"Lesen {self.read_s:.1f} s, Compute {self.compute_s:.1f} s, "
+            f"Warten auf I/O {self.consumer_wait_s:.1f} s, Backpressure {self.producer_wait_s:.1f} s, "
+            f"Wall {self.wall_s:.1f} s | Puffer-Peak {self.peak_buffered_mb:.0f} MB | "
+            f"Engpass: {self.bottleneck}"
+        )
+
+
+class PrefetchPipeline:
+    """
+    Producer/Consumer-Stufe: ein Lese-Thread liest die Dateien in der
+    Reihenfolge des sortierten Inventorys in sequentiellen Blöcken
+    (read_block_mb) vor, während der Aufrufer die aktuelle Datei verarbeitet.
+
+    Die Stage bekommt über item.open() einen Streaming-Reader über diese
+    Blöcke; verarbeitete Blöcke werden sofort freigegeben. Im RAM liegen daher
+    höchstens prefetch_mb (mindestens ein Block), unabhängig von der
+    Dateigröße. Ist der Puffer voll, wartet der Leser (Backpressure).
+
+    Beispiel:
+        pipe = PrefetchPipeline(prefetch_mb=128)
+        for item, result, error in pipe.run(rows, stage):
+            ...
+        logger.info(pipe.stats.summary())
+    """
+
+    def __init__(self, prefetch_mb=128, read_block_mb=16, sort_key="filepath"):
+        self.budget = int(prefetch_mb * MB)
+        self.read_block = int(read_block_mb * MB)
+        self.sort_key = sort_key
+        self.stats = PrefetchStats()
+
+        self._cond = threading.Condition()
+        self._buffered = 0
+        self._stop = threading.Event()
+
+    # --- Producer ---
+    def _reserve(self, nbytes):
+        """Wartet, bis nbytes in den Puffer passen. False, wenn abgebrochen wurde."""
+        t0 = time.perf_counter()
+        with self._cond:
+            while self._buffered > 0 and self._buffered + nbytes > self.budget:
+                if self._stop.is_set():
+                    return False
+                self._cond.wait(timeout=0.1)
+            self._buffered += nbytes
+            self.stats.peak_buffered_mb = max(self.stats.peak_buffered_mb, self._buffered / MB)
+        self.stats.producer_wait_s += time.perf_counter() - t0
+        return not self._stop.is_set()
+
+    def _release(self, nbytes):
+        with self._cond:
+            self._buffered -= nbytes
+            self._cond.notify_all()
+
+    def _read_blocks(self, f, size, q):
+        """Liest eine Datei blockweise in die Queue. False, wenn abgebrochen wurde."""
+        pos = 0
+        while pos < size:
+            n = min(self.read_block, size - pos)
+            if not self._reserve(n):
+                return False
+            t0 = time.perf_counter()
+            block = bytearray(n)
+            got = f.readinto(block)
+            self.stats.read_s += time.perf_counter() - t0
+            if got < n:
+                # Datei kürzer als beim stat(): Reservierung anpassen
+                self._release(n - got)
+                del block[got:]
+            if not got:
+                break
+            self.stats.bytes_read += got
+            pos += got
+            q.put(("block", block))
+        return True
+
+    def _produce(self, rows, q):
+        try:
+            for row in rows:
+                if self._stop.is_set():
+                    break
+                path = Path(row["filepath"])
+                try:
+                    size = path.stat().st_size
+                    f = open(path, "rb", buffering=0)
+                except OSError as e:
+                    q.put(("file", (row, 0, e)))
+                    continue
+
+                q.put(("file", (row, size, None)))
+                error = None
+                with f:
+                    try:
+                        if not self._read_blocks(f, size, q):
+                            error = InterruptedError("Prefetch abgebrochen")
+                    except OSError as e:
+                        error = e
+                q.put(("end", error))
+                if error is not None and self._stop.is_set():
+                    break
+        finally:
+            q.put(None)
+
+    # --- Consumer ---
+    def run(self, rows, stage: Callable[[PrefetchedFile], Any]):
+        """
+        Führt stage(item) für jede Datei aus, während die nächsten Blöcke vorgelesen werden.
+
+        Args:
+            rows: Iterable von Inventory-Zeilen (dicts mit 'filepath').
+            stage: Funktion, die eine PrefetchedFile verarbeitet (QC, Resampling, Inference, ...).
+                Liest sie die Datei nicht ganz, werden die restlichen Blöcke verworfen.
+
+        Yields:
+            (item, result, error) - error ist eine Exception aus Lesen oder stage, sonst None.
+        """
+        rows = sorted(rows, key=lambda r: str(r[self.sort_key]))
+        self.stats = PrefetchStats()
+        self._buffered = 0
+        self._stop.clear()
+        q = queue.Queue()
+        producer = threading.Thread(target=self._produce, args=(rows, q), daemon=True)
+
+        t_start = time.perf_counter()
+        producer.start()
+        try:
+            while True:
+                t0 = time.perf_counter()
+                msg = q.get()
+                self.stats.consumer_wait_s += time.perf_counter() - t0
+                if msg is None:
+                    break
+                row, size, error = msg[1]
+                item = PrefetchedFile(row, error=error)
+
+                result = None
+                if error is None:
+                    item.reader = BlockStreamReader(self, q, os.fspath(row["filepath"]), size)
+                    t0 = time.perf_counter()
+                    try:
+                        result = stage(item)
+                    except Exception as e:
+                        error = e
+                    # Warten auf Blöcke innerhalb der Stage ist I/O, kein Compute
+                    stage_wait = item.reader.wait_s
+                    self.stats.compute_s += time.perf_counter() - t0 - stage_wait
+                    item.reader.drain()
+                    self.stats.consumer_wait_s += item.reader.wait_s
+                    item.reader = None
+                self.stats.files += 1
+
+                yield item, result, error
+        finally:
+            self._stop.set()
+            with self._cond:
+                self._cond.notify_all()
+            producer.join()
+            self.stats.wall_s = time.perf_counter() - t_start
@@ -0,0 +1,202 @@
+# scripts/score_store.py
+import json
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+
+from scripts.chunked_predict import DETECTION_COLUMNS
+
+SPECIES_FILE = "species.json"
+META_FILE = "meta.json"
+ARRAYS = ["starts", "ends", "indptr", "indices", "data", "floors"]
+
+
+def flat_sigmoid(x, sensitivity=1.0):
+    """Sigmoid wie bei BirdNET (sigmoid_sensitivity), Logits auf [-15, 15] begrenzt."""
+    return 1.0 / (1.0 + np.exp(-sensitivity * np.clip(x, -15.0, 15.0)))
+
+
+class ScoreStore:
+    """
+    Speichert die rohen Modell-Scores (Logits) pro Datei als dünn besetzte
+    CSR-Matrix (Fenster x Arten), damit Schwelle und Sigmoid-Sensitivität
+    später geändert werden können, ohne die Inference neu zu rechnen.
+
+    Gespeichert wird nur, was über dem Floor liegt (logit >= min_logit und
+    optional top_k pro Fenster, beides schon beim predict() angewendet). Pro
+    file_id liegen die Arrays als .npy in root/<file_id>/ und werden mit
+    mmap_mode='r' geöffnet. Die Arten haben eine gemeinsame, stabile
+    Spalten-ID (species.json).
+
+    Hat top_k bei einem Fenster gegriffen, liegt dessen Floor beim kleinsten
+    behaltenen Logit statt bei min_logit ("floors" pro Fenster). Mit
+    top_k=None gilt überall min_logit.
+
+    Beispiel:
+        store = ScoreStore("outputs/scores/birdnet", min_logit=-4.0, top_k=None)
+        store.write(file_id, raw_predictions)
+        df = store.detections(threshold=0.05, sensitivity=1.25)
+    """
+
+    def __init__(self, root, min_logit=-4.0, top_k=None):
+        self.root = Path(root)
+        self.min_logit = min_logit
+        self.top_k = top_k
+        self.root.mkdir(parents=True, exist_ok=True)
+
+        species_path = self.root / SPECIES_FILE
+        if species_path.exists():
+            with open(species_path, "r", encoding="utf-8") as f:
+                self.species = json.load(f)
+        else:
+            self.species = []
+        self._species_idx = {name: i for i, name in enumerate(self.species)}
+
+    # --- ARTEN ---
+    def _species_ids(self, names):
+        """Art-Namen -> Spalten-IDs; neue Arten werden hinten angehängt."""
+        uniques, inverse = np.unique(np.asarray(names, dtype=str), return_inverse=True)
+        new = [u for u in uniques if u not in self._species_idx]
+        if new:
+            for name in new:
+                self._species_idx[name] = len(self.species)
+                self.species.append(name)
+            tmp = self.root / (SPECIES_FILE + ".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.species, f, ensure_ascii=False)
+            os.replace(tmp, self.root / SPECIES_FILE)
+        lookup = np.array([self._species_idx[u] for u in uniques], dtype="int32")
+        return lookup[inverse]
+
+    # --- SCHREIBEN ---
+    def write(self, file_id, raw):
+        """
+        Speichert die Roh-Scores einer Datei.
+
+        Args:
+            raw: Tabelle mit start_s, end_s, species_name, confidence, wobei
+                confidence die Logits sind (predict mit apply_sigmoid=False,
+                threshold=min_logit, top_k wie im Store).
+        """
+        raw = raw[raw["confidence"] >= self.min_logit]
+        starts = raw["start_s"].to_numpy(dtype="float64")
+        ends = raw["end_s"].to_numpy(dtype="float64")
+
+        # Fenster = eindeutige Startzeiten, Zeilen der Matrix
+        win_starts, win_idx = np.unique(starts, return_inverse=True)
+        win_ends = np.zeros(len(win_starts))
+        np.maximum.at(win_ends, win_idx, ends)
+        cols = self._species_ids(raw["species_name"])
+        data = raw["confidence"].to_numpy(dtype="float32")
+
+        order = np.lexsort((cols, win_idx))
+        counts = np.bincount(win_idx, minlength=len(win_starts))
+        indptr = np.concatenate([[0], np.cumsum(counts)]).astype("int64")
+
+        # Fenster mit top_k Einträgen: darunter kann predict() Arten abgeschnitten haben
+        floors = np.full(len(win_starts), self.min_logit, dtype="float32")
+        if self.top_k is not None and len(win_starts):
+            row_min = np.minimum.reduceat(data[order], indptr[:-1])
+            capped = counts >= self.top_k
+            floors[capped] = np.maximum(row_min[capped], self.min_logit)
+
+        arrays = {
+            "starts": win_starts.astype("float32"),
+            "ends": win_ends.astype("float32"),
+            "indptr": indptr,
+            "indices": cols[order],
+            "data": data[order],
+            "floors": floors,
+        }
+
+        # Erst in .tmp schreiben, dann umbenennen
+        final_dir = self.root / file_id
+        tmp_dir = self.root / f"{file_id}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_dir.mkdir(parents=True)
+        for name, arr in arrays.items():
+            np.save(tmp_dir / f"{name}.npy", arr)
+        with open(tmp_dir / META_FILE, "w", encoding="utf-8") as f:
+            json.dump({"file_id": file_id, "min_logit": self.min_logit, "top_k": self.top_k}, f)
+        shutil.rmtree(final_dir, ignore_errors=True)
+        tmp_dir.rename(final_dir)
+
+    # --- LESEN ---
+    def file_ids(self):
+        return sorted(p.name for p in self.root.iterdir() if (p / META_FILE).exists())
+
+    def load(self, file_id):
+        """
+        Returns:
+            (matrix, starts, ends, floors) - matrix ist eine csr_matrix
+            (Fenster x Arten) auf Basis der memory-mapped Arrays, floors der
+            kleinste vollständig gespeicherte Logit pro Fenster.
+        """
+        d = self.root / file_id
+        a = {name: np.load(d / f"{name}.npy", mmap_mode="r") for name in ARRAYS}
+        matrix = csr_matrix(
+            (a["data"], a["indices"], a["indptr"]),
+            shape=(len(a["starts"]), len(self.species)),
+            copy=False,
+        )
+        return matrix, a["starts"], a["ends"], a["floors"]
+
+    def min_confidence(self, sensitivity=1.0):
+        """Kleinste Konfidenz, die bei dieser Sensitivität vollständig im Store liegt."""
+        return float(flat_sigmoid(self.min_logit, sensitivity))
+
+    def detections(self, threshold=0.1, sensitivity=1.0, file_ids=None, strict=True):
+        """
+        Detektionstabelle für eine neue Schwelle / Sensitivität (vektorisiert pro Datei).
+
+        Args:
+            strict: True -> Fehler, sobald ein Fenster wegen top_k unvollständig
+                wäre. False -> Tabelle mit Zusatzspalte window_complete
+                (False = dort könnten Arten über der Schwelle fehlen).
+
+        Raises:
+            ValueError: wenn die Schwelle unter min_logit oder (strict) unter
+                dem top_k-Floor eines Fensters liegt (das Ergebnis wäre unvollständig).
+        """
+        if sensitivity > 0 and threshold < self.min_confidence(sensitivity):
+            raise ValueError(
+                f"Schwelle {threshold} liegt unter dem Floor des Stores "
+                f"({self.min_confidence(sensitivity):.4f} bei sensitivity={sensitivity}, "
+                f"min_logit={self.min_logit}). Inference mit kleinerem min_logit nötig."
+            )
+
+        columns = DETECTION_COLUMNS if strict else DETECTION_COLUMNS + ["window_complete"]
+        species = np.asarray(self.species, dtype=object)
+        parts = []
+        for file_id in (file_ids if file_ids is not None else self.file_ids()):
+            matrix, starts, ends, floors = self.load(file_id)
+            # Unter dem Floor eines Fensters können Arten fehlen, die die Schwelle erreichen
+            incomplete = (flat_sigmoid(np.asarray(floors), sensitivity) > threshold) & (sensitivity > 0)
+            if strict and incomplete.any():
+                raise ValueError(
+                    f"{file_id}: {int(incomplete.sum())} Fenster sind bei Schwelle {threshold} "
+                    f"unvollständig (top_k={self.top_k} hat gegriffen). "
+                    f"strict=False markiert sie, top_k=None vermeidet den Fall."
+                )
+
+            conf = flat_sigmoid(np.asarray(matrix.data), sensitivity)
+            keep = conf >= threshold
+            if not keep.any():
+                continue
+            rows = np.repeat(np.arange(matrix.shape[0]), np.diff(matrix.indptr))[keep]
+            parts.append(pd.DataFrame({
+                "file_id": file_id,
+                "start_s": np.asarray(starts)[rows].astype(float),
+                "end_s": np.asarray(ends)[rows].astype(float),
+                "species_name": species[np.asarray(matrix.indices)[keep]],
+                "confidence": conf[keep],
+                "window_complete": ~incomplete[rows],
+            }))
+
+        if not parts:
+            return pd.DataFrame(columns=columns)
+        return pd.concat(parts, ignore_index=True)[columns]
@@ -0,0 +1,187 @@
+# scripts/spectrogram_tiles.py
+import json
+import math
+import shutil
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+
+from scripts.chunked_predict import iter_audio_chunks, plan_chunk_frames
+
+META_FILE = "meta.json"
+
+
+# --- HELFER: Mel-Filterbank (ohne librosa) ---
+def hz_to_mel(f):
+    return 2595.0 * np.log10(1.0 + np.asarray(f, dtype=float) / 700.0)
+
+
+def mel_to_hz(m):
+    return 700.0 * (10.0 ** (np.asarray(m, dtype=float) / 2595.0) - 1.0)
+
+
+def mel_filterbank(samplerate, n_fft, n_mels, fmin, fmax):
+    """
+    Dreieck-Filterbank (HTK-Mel), Form (n_mels, n_fft // 2 + 1).
+    """
+    fmax = min(fmax, samplerate / 2)
+    fft_freqs = np.linspace(0, samplerate / 2, n_fft // 2 + 1)
+    mel_points = mel_to_hz(np.linspace(hz_to_mel(fmin), hz_to_mel(fmax), n_mels + 2))
+
+    lower = mel_points[:-2, None]
+    center = mel_points[1:-1, None]
+    upper = mel_points[2:, None]
+    rising = (fft_freqs[None, :] - lower) / (center - lower)
+    falling = (upper - fft_freqs[None, :]) / (upper - center)
+    return np.maximum(0.0, np.minimum(rising, falling)).astype("float32")
+
+
+def _quantize_db(power, db_range):
+    """Leistung -> dB -> uint8 (fester dB-Bereich, damit alle Chunks/Dateien vergleichbar sind)."""
+    lo, hi = db_range
+    db = 10.0 * np.log10(np.maximum(power, 1e-12))
+    scaled = (db - lo) * (255.0 / (hi - lo))
+    return np.clip(scaled, 0, 255).astype("uint8")
+
+
+# --- HAUPTFUNKTION: Pyramide bauen ---
+def build_tiles(source, tiles_dir, file_id, hop_s=0.04, n_fft=4096, n_mels=64,
+                fmin=150, fmax=15000, levels=6, db_range=(-100.0, -20.0),
+                max_buffer_mb=64, stft_batch=1024):
+    """
+    Berechnet in einem Streaming-Durchlauf eine Pyramide aus log-Mel-Spektrogrammen.
+
+    Level 0 hat die volle Zeitauflösung (hop_s), jedes weitere Level halbiert
+    sie per Max-Pooling (kurze Rufe bleiben auch herausgezoomt sichtbar).
+    Jedes Level ist ein uint8-Array (frames x n_mels) als .npy und kann mit
+    mmap_mode='r' geöffnet werden. Geschrieben wird zuerst in ein .tmp-Verzeichnis,
+    das am Ende umbenannt wird.
+
+    Args:
+        source: Pfad oder file-like Objekt, das sequentiell gelesen wird
+            (z.B. item.open() der PrefetchPipeline).
+
+    Returns:
+        dict mit den Metadaten (auch als meta.json gespeichert).
+    """
+    tiles_dir = Path(tiles_dir)
+    final_dir = tiles_dir / file_id
+    tmp_dir = tiles_dir / f"{file_id}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+
+    with sf.SoundFile(source) as f:
+        sr = f.samplerate
+        hop = round(hop_s * sr)
+        if hop > n_fft:
+            raise ValueError(f"hop ({hop} Samples) darf nicht größer als n_fft ({n_fft}) sein")
+        n_frames = 1 + (f.frames - n_fft) // hop if f.frames >= n_fft else 0
+
+        mel = mel_filterbank(sr, n_fft, n_mels, fmin, fmax)
+        window = np.hanning(n_fft).astype("float32")
+        norm = 4.0 / float(window.sum()) ** 2  # Vollaussteuerung (Sinus) ~ 0 dB
+
+        level0 = np.lib.format.open_memmap(
+            tmp_dir / "level_0.npy", mode="w+", dtype="uint8", shape=(n_frames, n_mels)
+        )
+
+        # Chunks so wählen, dass jedes STFT-Fenster genau einem Chunk gehört
+        chunk_frames, overlap_frames = plan_chunk_frames(
+            sr, f.channels, hop / sr, (n_fft - hop) / sr, max_buffer_mb
+        )
+        if n_frames > 0:
+            for start_frame, block, is_last in iter_audio_chunks(f, chunk_frames, overlap_frames):
+                mono = block.mean(axis=1) if block.shape[1] > 1 else block[:, 0]
+                if len(mono) < n_fft:
+                    break
+                frames = np.lib.stride_tricks.sliding_window_view(mono, n_fft)[::hop]
+                first = start_frame // hop
+                frames = frames[:n_frames - first]
+
+                for b in range(0, len(frames), stft_batch):
+                    spec = np.fft.rfft(frames[b:b + stft_batch] * window, axis=1)
+                    power = (spec.real ** 2 + spec.imag ** 2) * norm
+                    level0[first + b:first + b + len(spec)] = _quantize_db(power @ mel.T, db_range)
+
+        level0.flush()
+        del level0
+
+    # --- Weitere Level per Max-Pooling (blockweise aus dem Memmap) ---
+    level_frames = [n_frames]
+    prev = np.load(tmp_dir / "level_0.npy", mmap_mode="r")
+    for k in range(1, levels):
+        n = math.ceil(len(prev) / 2)
+        cur = np.lib.format.open_memmap(
+            tmp_dir / f"level_{k}.npy", mode="w+", dtype="uint8", shape=(n, n_mels)
+        )
+        step = 2 * 65536
+        for i in range(0, len(prev), step):
+            part = np.asarray(prev[i:i + step])
+            if len(part) % 2:
+                part = np.vstack([part, part[-1:]])
+            cur[i // 2:i // 2 + len(part) // 2] = part.reshape(-1, 2, n_mels).max(axis=1)
+        cur.flush()
+        del cur
+        level_frames.append(n)
+        del prev
+        prev = np.load(tmp_dir / f"level_{k}.npy", mmap_mode="r")
+    del prev
+
+    meta = {
+        "file_id": file_id,
+        "samplerate": sr,
+        "n_fft": n_fft,
+        "n_mels": n_mels,
+        "fmin": fmin,
+        "fmax": min(fmax, sr / 2),
+        "db_range": list(db_range),
+        "hop_s": [hop / sr * 2 ** k for k in range(levels)],
+        "n_frames": level_frames,
+    }
+    with open(tmp_dir / META_FILE, "w", encoding="utf-8") as fh:
+        json.dump(meta, fh, indent=2)
+
+    shutil.rmtree(final_dir, ignore_errors=True)
+    tmp_dir.rename(final_dir)
+    return meta
+
+
+# --- ABRUF ---
+def load_meta(tiles_dir, file_id):
+    with open(Path(tiles_dir) / file_id / META_FILE, "r", encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def pick_level(meta, start_s, end_s, max_frames=2000):
+    """
+    Feinstes Level, bei dem der Zeitbereich höchstens max_frames Spalten hat
+    (z.B. Bildschirmbreite in Pixeln).
+    """
+    for level, hop in enumerate(meta["hop_s"]):
+        if (end_s - start_s) / hop <= max_frames:
+            return level
+    return len(meta["hop_s"]) - 1
+
+
+def load_tile(tiles_dir, file_id, start_s, end_s, level=None, max_frames=2000):
+    """
+    Liest den Ausschnitt [start_s, end_s) eines Spektrogramms, ohne das Audio anzufassen.
+
+    Args:
+        level: Zoom-Level (0 = volle Auflösung). None -> pick_level.
+
+    Returns:
+        (tile, meta, level) - tile ist ein uint8-Array (frames x n_mels),
+        eine View auf die memory-mapped Datei.
+    """
+    meta = load_meta(tiles_dir, file_id)
+    if level is None:
+        level = pick_level(meta, start_s, end_s, max_frames)
+    hop = meta["hop_s"][level]
+
+    arr = np.load(Path(tiles_dir) / file_id / f"level_{level}.npy", mmap_mode="r")
+    # kleine Toleranz gegen Rundungsfehler (z.B. 11.8 / 0.02 = 590.0000001)
+    i0 = max(0, int(math.floor(start_s / hop + 1e-9)))
+    i1 = min(len(arr), int(math.ceil(end_s / hop - 1e-9)))
+    return arr[i0:i1], meta, level
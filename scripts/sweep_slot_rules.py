@@ -0,0 +1,49 @@
+import sys
+import pandas as pd
+from pathlib import Path
+
+# Pfad-Fix für utils Import
+sys.path.append(str(Path(__file__).parent.parent))
+from scripts.utils import load_config, setup_logger, sweep_slot_rules
+
+
+def main():
+    config_path = "config/pipeline.yaml"
+    cfg = load_config(config_path)
+    logger = setup_logger("SlotSweep", cfg["paths"]["pipeline_log"])
+
+    inventory_csv = Path(cfg["paths"]["inventory_csv"])
+    output_csv = Path(cfg["paths"]["slot_sweep_csv"])
+    sweep = cfg["sun_checks"]["sweep"]
+
+    if not inventory_csv.exists():
+        logger.critical("Inventory fehlt! Bitte erst '01_build_inventory.py' ausführen.")
+        sys.exit(1)
+
+    df = pd.read_csv(inventory_csv)
+
+    # Morgens zählt der Abstand zum Sonnenaufgang, abends der zum Sonnenuntergang
+    df = df[df["session"].isin(["morning", "evening"])]
+    events = df["session"].map({"morning": "sunrise", "evening": "sunset"})
+    diff = df["min_to_sunrise"].where(df["session"] == "morning", df["min_to_sunset"])
+
+    logger.info(
+        f"Sweep über {len(df)} Dateien: {len(sweep['tolerance_min'])} Toleranzen x "
+        f"{len(sweep['allowed_slot_min'])} Slot-Sets"
+    )
+    result = sweep_slot_rules(diff, events, sweep["tolerance_min"], sweep["allowed_slot_min"])
+
+    output_csv.parent.mkdir(parents=True, exist_ok=True)
+    result.to_csv(output_csv, index=False)
+    logger.info(f"Sweep gespeichert: {output_csv}")
+
+    # Übersicht: Dateien pro Slot je Kombination
+    pd.set_option("display.width", 1000)
+    print(result.pivot_table(
+        index=["tolerance_min", "allowed_slot_min"], columns=["event", "slot"],
+        values="n_files", fill_value=0,
+    ))
+
+
+if __name__ == "__main__":
+    main()
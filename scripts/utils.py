@@ -4,6 +4,7 @@ from pathlib import Path
 import sys
 import yaml
 import logging
+import numpy as np
 import pandas as pd
 
 # --- KONFIGURATION LADEN ---
@@ -47,10 +48,13 @@ def get_session(dt, morning_range, evening_range):
     return "other"
 
 
-def calculate_slot_with_tolerance(file_start_dt, sun_event_dt, event_name, tolerance_min=15):
+def calculate_slot_with_tolerance(file_start_dt, sun_event_dt, event_name, tolerance_min=15, allowed_slots=None):
     """
     Berechnet den Slot (z.B. sunrise_-120) mit Toleranz.
     Robust gegen Zeitzonen und Datentypen.
+
+    allowed_slots: Liste erlaubter Offsets in Minuten (z.B. [-120, -60, 0, 60, 120]
+    aus sun_checks.allowed_slot_min). Ohne Liste zählt jede volle Stunde.
     """
     # 1. Sicherheits-Check
     if pd.isna(sun_event_dt) or pd.isna(file_start_dt):
@@ -67,24 +71,76 @@ def calculate_slot_with_tolerance(file_start_dt, sun_event_dt, event_name, toler
     delta = dt_file - dt_sun
     diff_minutes = delta.total_seconds() / 60.0
     
-    # 4. Welcher vollen Stunde sind wir am nächsten?
-    # Wir runden auf Stundenbasis, um die "Slots" (60, 120, 180...) zu finden
-    hour_offset = round(diff_minutes / 60.0)
+    # 4. Welchem Slot sind wir am nächsten?
+    if allowed_slots:
+        # Nur die konfigurierten Slots kommen in Frage
+        expected_minutes = min(allowed_slots, key=lambda s: abs(diff_minutes - s))
+    else:
+        # Wir runden auf Stundenbasis, um die "Slots" (60, 120, 180...) zu finden
+        expected_minutes = round(diff_minutes / 60.0) * 60.0
     
     # 5. Abweichungs-Check
-    expected_minutes = hour_offset * 60.0
     deviation = abs(diff_minutes - expected_minutes)
     
     # 6. Toleranz-Check
     if deviation <= tolerance_min:
-        # ÄNDERUNG: Wir rechnen die Stunden zurück in Minuten für das Label
-        # z.B. -2 * 60 = -120
-        slot_minutes = int(hour_offset * 60)
+        # z.B. -120 -> "sunrise_-120"
+        slot_minutes = int(expected_minutes)
         return f"{event_name}_{slot_minutes}", diff_minutes
     else:
         return None, diff_minutes
 
 
+# --- HELFER: Slot-Regeln durchprobieren (Sweep) ---
+def sweep_slot_rules(diff_minutes, events, tolerances, slot_sets):
+    """
+    Wertet viele Kombinationen aus Toleranz und erlaubten Slots in einem
+    NumPy-Durchlauf aus (Broadcasting statt Schleife über Dateien).
+
+    Args:
+        diff_minutes: Abstand jeder Datei zum Sonnenereignis in Minuten (NaN = kein Ereignis).
+        events: Ereignis je Datei, z.B. "sunrise" / "sunset".
+        tolerances: Liste von Toleranzen in Minuten.
+        slot_sets: Liste von Listen erlaubter Slots in Minuten.
+
+    Returns:
+        DataFrame (tolerance_min, allowed_slot_min, event, slot, n_files).
+        slot ist "no_slot", wenn keine erlaubte Stelle innerhalb der Toleranz liegt.
+    """
+    diff = np.asarray(diff_minutes, dtype=float)
+    event_codes, event_names = pd.factorize(pd.Series(events).astype(str))
+    tol = np.asarray(tolerances, dtype=float)
+
+    # Alle vorkommenden Slots + Maske, welcher Slot in welcher Kombination erlaubt ist
+    slots = np.array(sorted({s for slot_set in slot_sets for s in slot_set}), dtype=float)
+    allowed = np.array([[s in set(slot_set) for s in slots] for slot_set in slot_sets])   # (K, S)
+
+    # (K, N, S): Abweichung zu jedem erlaubten Slot, nicht erlaubte = inf
+    dev = np.abs(diff[None, :, None] - slots[None, None, :])
+    dev = np.where(allowed[:, None, :], dev, np.inf)
+    best = dev.argmin(axis=2)                                            # (K, N)
+    best_dev = np.take_along_axis(dev, best[:, :, None], axis=2)[:, :, 0]
+
+    # (T, K, N): Treffer je Toleranz; NaN-Abstände fallen automatisch raus
+    hit = best_dev[None, :, :] <= tol[:, None, None]
+    slot_idx = np.where(hit, best[None, :, :], len(slots))              # len(slots) = no_slot
+
+    # Zählen über einen kombinierten Index (Toleranz, Slot-Set, Ereignis, Slot)
+    n_t, n_k, n_e, n_s = len(tol), len(slot_sets), len(event_names), len(slots) + 1
+    t_idx = np.arange(n_t)[:, None, None]
+    k_idx = np.arange(n_k)[None, :, None]
+    code = ((t_idx * n_k + k_idx) * n_e + event_codes[None, None, :]) * n_s + slot_idx
+    counts = np.bincount(code.ravel(), minlength=n_t * n_k * n_e * n_s).reshape(n_t, n_k, n_e, n_s)
+
+    t, k, e, s = np.nonzero(counts)
+    slot_labels = [str(int(x)) for x in slots] + ["no_slot"]
+    return pd.DataFrame({
+        "tolerance_min": tol[t],
+        "allowed_slot_min": [str(list(slot_sets[i])) for i in k],
+        "event": np.asarray(event_names)[e],
+        "slot": np.asarray(slot_labels)[s],
+        "n_files": counts[t, k, e, s],
+    })
 
 
 def setup_logger(name, log_file):
@@ -0,0 +1,140 @@
+# tests/test_activity_cube.py
+import sys
+import os
+
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.activity_cube import ActivityCube
+
+INVENTORY = pd.DataFrame({
+    "file_id": ["R1_20250407_060001", "R1_20250408_060001", "R1_20250406_181000"],
+    "recorder_id": ["R1", "R1", "R1"],
+    "date": ["2025-04-07", "2025-04-08", "2025-04-06"],
+    "solar_slot": ["sunrise_-60", "sunrise_-60", "sunset_-120"],
+    "birdnet_week48": [13.0, 14.0, 13.0],
+})
+
+
+def detections(file_id, species, confs):
+    return pd.DataFrame({"file_id": file_id, "species_name": species, "confidence": confs})
+
+
+def test_incremental_update_equals_full_build(tmp_path):
+    d1 = detections("R1_20250407_060001", "Turdus merula", [0.5, 0.7])
+    d2 = detections("R1_20250406_181000", "Turdus merula", [0.4])
+    d3 = detections("R1_20250408_060001", "Parus major", [0.9])
+
+    inc = ActivityCube.load(tmp_path / "inc.json")
+    for d in (d1, d2, d3):
+        inc.update(d, INVENTORY)
+
+    full = ActivityCube.load(tmp_path / "full.json")
+    full.update(pd.concat([d1, d2, d3]), INVENTORY)
+
+    pd.testing.assert_frame_equal(inc.table.sort_index(), full.table.sort_index())
+
+    cell = inc.query(species_name="Turdus merula", solar_slot="sunrise_-60").iloc[0]
+    assert cell["n_detections"] == 2
+    assert cell["mean_confidence"] == pytest.approx(0.6)
+    assert cell["birdnet_week48"] == 13
+
+
+def test_same_file_is_not_counted_twice(tmp_path):
+    cube = ActivityCube.load(tmp_path / "cube.json")
+    d1 = detections("R1_20250407_060001", "Turdus merula", [0.5])
+
+    assert cube.update(d1, INVENTORY) == 1
+    assert cube.update(d1, INVENTORY) == 0
+    assert cube.table["n_detections"].sum() == 1
+
+
+def test_save_load_roundtrip_and_profile(tmp_path):
+    cube = ActivityCube.load(tmp_path / "cube.json")
+    cube.update(detections("R1_20250407_060001", "Turdus merula", [0.5, 0.6]), INVENTORY)
+    cube.update(detections("R1_20250406_181000", "Turdus merula", [0.4]), INVENTORY)
+    # Datei ohne Detektionen zählt trotzdem als verarbeitet
+    cube.update(detections("x", "y", []), INVENTORY, file_ids=["R1_20250408_060001"])
+    cube.save()
+
+    loaded = ActivityCube.load(tmp_path / "cube.json")
+    assert loaded.file_ids == cube.file_ids
+    pd.testing.assert_frame_equal(loaded.table.sort_index(), cube.table.sort_index(), check_dtype=False)
+
+    profile = loaded.slot_profile()
+    assert profile.loc["Turdus merula", "sunrise_-60"] == 2
+    assert profile.loc["Turdus merula", "sunset_-120"] == 1
+
+
+def test_update_is_durable_without_save(tmp_path):
+    cube = ActivityCube.load(tmp_path / "cube.json")
+    cube.update(detections("R1_20250407_060001", "Turdus merula", [0.5, 0.6]), INVENTORY)
+    cube.update(detections("x", "y", []), INVENTORY, file_ids=["R1_20250408_060001"])
+
+    # Kein save(): alles steht im Log
+    assert not (tmp_path / "cube.json").exists()
+    loaded = ActivityCube.load(tmp_path / "cube.json")
+    assert loaded.file_ids == cube.file_ids
+    pd.testing.assert_frame_equal(loaded.table.sort_index(), cube.table.sort_index(), check_dtype=False)
+
+
+def test_torn_log_line_is_dropped(tmp_path):
+    cube = ActivityCube.load(tmp_path / "cube.json")
+    cube.update(detections("R1_20250407_060001", "Turdus merula", [0.5]), INVENTORY)
+    size = cube.log_path.stat().st_size
+    # Absturz mitten im Schreiben der zweiten Zeile
+    with open(cube.log_path, "a", encoding="utf-8") as f:
+        f.write('{"seq": 2, "file_ids": ["R1_2025')
+
+    loaded = ActivityCube.load(tmp_path / "cube.json")
+    assert loaded.file_ids == {"R1_20250407_060001"}
+    assert loaded.table["n_detections"].sum() == 1
+    assert loaded.log_path.stat().st_size == size
+
+    # Die Datei wird beim nächsten Lauf normal nachgetragen
+    loaded.update(detections("R1_20250406_181000", "Turdus merula", [0.4]), INVENTORY)
+    assert ActivityCube.load(tmp_path / "cube.json").table["n_detections"].sum() == 2
+
+
+def test_crash_during_compaction_does_not_double_count(tmp_path):
+    cube = ActivityCube.load(tmp_path / "cube.json")
+    cube.update(detections("R1_20250407_060001", "Turdus merula", [0.5]), INVENTORY)
+    log = cube.log_path.read_bytes()
+    cube.save()
+    assert cube.log_path.stat().st_size == 0
+
+    # Snapshot ist ersetzt, aber das Log wurde nicht mehr geleert
+    cube.log_path.write_bytes(log)
+    loaded = ActivityCube.load(tmp_path / "cube.json")
+    assert loaded.table["n_detections"].sum() == 1
+
+
+def test_log_is_compacted_periodically(tmp_path):
+    cube = ActivityCube.load(tmp_path / "cube.json", compact_every=2)
+    cube.update(detections("R1_20250407_060001", "Turdus merula", [0.5]), INVENTORY)
+    assert not (tmp_path / "cube.json").exists()
+    cube.update(detections("R1_20250406_181000", "Turdus merula", [0.4]), INVENTORY)
+
+    assert (tmp_path / "cube.json").exists()
+    assert cube.log_path.stat().st_size == 0
+    assert ActivityCube.load(tmp_path / "cube.json").table["n_detections"].sum() == 2
+
+
+def test_reopened_cube_continues_sequence(tmp_path):
+    first = ActivityCube.load(tmp_path / "cube.json")
+    first.update(detections("R1_20250407_060001", "Turdus merula", [0.5]), INVENTORY)
+    first.save()
+    first.update(detections("R1_20250406_181000", "Turdus merula", [0.4]), INVENTORY)
+
+    # Auch der direkte Konstruktor liest Snapshot + Log, die Sequenz läuft weiter
+    reopened = ActivityCube(tmp_path / "cube.json")
+    assert reopened.seq == 2
+    assert reopened.update(detections("R1_20250407_060001", "Turdus merula", [0.5]), INVENTORY) == 0
+    reopened.update(detections("R1_20250408_060001", "Parus major", [0.9]), INVENTORY)
+
+    loaded = ActivityCube.load(tmp_path / "cube.json")
+    assert loaded.seq == 3
+    assert loaded.table["n_detections"].sum() == 3
+    assert len(loaded.file_ids) == 3
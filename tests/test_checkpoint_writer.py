@@ -0,0 +1,67 @@
+# tests/test_checkpoint_writer.py
+import sys
+import os
+
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.checkpoint_writer import ScanCheckpoint, StreamingCsvWriter
+
+COLUMNS = ["file", "issue", "val"]
+
+
+def make(tmp_path):
+    w = StreamingCsvWriter(tmp_path / "out.csv", COLUMNS)
+    ckpt = ScanCheckpoint(tmp_path / "out.csv.checkpoint.json", {"out": w})
+    return w, ckpt
+
+
+def test_resume_after_crash_drops_uncommitted_rows(tmp_path):
+    w, ckpt = make(tmp_path)
+    assert ckpt.resume() == set()
+
+    done = set()
+    for name in ["a", "b"]:
+        w.append({"file": name, "issue": "ok"})
+        done.add(name)
+    ckpt.commit(done)
+
+    # Nach dem Checkpoint geschrieben, aber nicht committet -> "Absturz"
+    w.append({"file": "c", "issue": "ok"})
+    w.flush()
+    assert not (tmp_path / "out.csv").exists()
+
+    # Neustart
+    w2, ckpt2 = make(tmp_path)
+    done2 = ckpt2.resume()
+    assert done2 == {"a", "b"}
+    w2.append({"file": "c", "issue": "ok", "val": 1.5})
+    done2.add("c")
+    ckpt2.commit(done2)
+    ckpt2.finish()
+
+    df = pd.read_csv(tmp_path / "out.csv")
+    assert df["file"].tolist() == ["a", "b", "c"]
+    assert df.columns.tolist() == COLUMNS
+    assert not (tmp_path / "out.csv.partial").exists()
+    assert not (tmp_path / "out.csv.checkpoint.json").exists()
+
+
+def test_fresh_start_discards_stale_partial(tmp_path):
+    (tmp_path / "out.csv.partial").write_text("file,issue,val\nold,x,\n")
+    w, ckpt = make(tmp_path)
+    assert ckpt.resume() == set()
+
+    w.append({"file": "new", "issue": "ok"})
+    ckpt.commit({"new"})
+    ckpt.finish()
+
+    assert pd.read_csv(tmp_path / "out.csv")["file"].tolist() == ["new"]
+
+
+def test_finalize_without_rows_writes_header(tmp_path):
+    w, ckpt = make(tmp_path)
+    ckpt.resume()
+    ckpt.finish()
+    assert pd.read_csv(tmp_path / "out.csv").columns.tolist() == COLUMNS
@@ -0,0 +1,125 @@
+# tests/test_chunked_predict.py
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+import soundfile as sf
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.chunked_predict import make_model_predictor, plan_chunk_frames, predict_chunked, to_pcm16, to_seconds
+
+SR = 1000  # kleine Samplerate, damit die Tests schnell sind
+
+
+def fake_predictor(window_s, hop_s):
+    """
+    Simuliert ein Modell: ein Fenster pro Hop, solange das Fenster in den Block passt.
+    Das Signal ist eine Rampe (Wert = Zeit in s / 1000), so kann der Test
+    die absolute Startzeit jedes Fensters aus den Samples zurückrechnen.
+    """
+    def predict_fn(samples, samplerate):
+        rows = []
+        n = len(samples)
+        start = 0.0
+        while start * samplerate < n:
+            first_sample = samples[int(start * samplerate), 0]
+            rows.append({
+                "start_s": start,
+                "end_s": start + window_s,
+                "species_name": "Turdus merula_Eurasian Blackbird",
+                "confidence": float(first_sample) * 1000,  # = absolute Startzeit
+            })
+            start += hop_s
+        return pd.DataFrame(rows)
+    return predict_fn
+
+
+@pytest.fixture
+def ramp_wav(tmp_path):
+    duration_s = 100
+    t = np.arange(duration_s * SR, dtype="float32") / SR
+    path = tmp_path / "REC_20250501_050000.wav"
+    sf.write(str(path), t / 1000, SR, subtype="FLOAT")
+    return path
+
+
+def test_plan_chunk_frames_respects_budget_and_hop():
+    chunk, overlap = plan_chunk_frames(96000, 1, hop_s=1.0, overlap_s=2.0, max_buffer_mb=64)
+    assert chunk % 96000 == 0
+    assert (chunk + overlap) * 4 <= 64 * 1024 * 1024
+
+
+def test_plan_chunk_frames_too_small():
+    with pytest.raises(ValueError):
+        plan_chunk_frames(96000, 1, hop_s=1.0, overlap_s=2.0, max_buffer_mb=0.5)
+
+
+def test_chunked_matches_whole_file(ramp_wav):
+    predict_fn = fake_predictor(window_s=3.0, hop_s=1.0)
+
+    # Riesiger Puffer -> ein einziger Chunk
+    whole = predict_chunked(ramp_wav, predict_fn, window_s=3.0, overlap_s=2.0, max_buffer_mb=10)
+    # Kleiner Puffer (~17 s pro Chunk) -> viele Chunks
+    chunked = predict_chunked(ramp_wav, predict_fn, window_s=3.0, overlap_s=2.0, max_buffer_mb=0.075)
+
+    assert len(whole) == 100
+    assert chunked["start_s"].tolist() == whole["start_s"].tolist()
+    assert not chunked["start_s"].duplicated().any()
+    # Absolute Offsets stimmen mit dem Audioinhalt überein
+    np.testing.assert_allclose(chunked["confidence"], chunked["start_s"], atol=1e-3)
+    assert (chunked["file_id"] == "REC_20250501_050000").all()
+
+
+def test_to_seconds_handles_strings_and_numbers():
+    assert to_seconds(pd.Series(["00:01:02.50"])).iloc[0] == 62.5
+    assert to_seconds(pd.Series([3.0])).iloc[0] == 3.0
+
+
+def test_model_overlap_must_match_chunk_grid(ramp_wav):
+    predict_fn = make_model_predictor(model=None, overlap_s=1.0)
+    assert predict_fn.overlap_s == 1.0
+
+    # Chunk-Raster mit 2.0 s, Modell mit 1.0 s -> Fenster würden nicht zusammenpassen
+    with pytest.raises(ValueError):
+        predict_chunked(ramp_wav, predict_fn, window_s=3.0, overlap_s=2.0)
+
+    with pytest.raises(ValueError):
+        make_model_predictor(model=None, overlap_s=2.0, overlap_duration_s=1.0)
+
+
+def test_model_predictor_writes_pcm16_to_tmp_dir(tmp_path):
+    seen = {}
+
+    class FakeResult:
+        def to_dataframe(self):
+            return pd.DataFrame({
+                "start_time": ["00:00:00.00"], "end_time": ["00:00:03.00"],
+                "species_name": ["A"], "confidence": [0.5],
+            })
+
+    class FakeModel:
+        def predict(self, path, **kwargs):
+            seen["info"] = sf.info(path)
+            seen["dir"] = os.path.dirname(path)
+            seen["kwargs"] = kwargs
+            return FakeResult()
+
+    predict_fn = make_model_predictor(FakeModel(), overlap_s=2.0, tmp_dir=tmp_path)
+    df = predict_fn(np.full(3 * SR, 1.5, dtype="float32"), SR)
+
+    assert df["species_name"].tolist() == ["A"]
+    assert seen["info"].subtype == "PCM_16"
+    assert seen["dir"] == str(tmp_path)
+    assert seen["kwargs"]["overlap_duration_s"] == 2.0
+    assert list(tmp_path.iterdir()) == []  # Temp-Datei wieder gelöscht
+
+
+def test_to_pcm16_clips_into_preallocated_buffer():
+    x = np.linspace(-1.5, 1.5, 200001, dtype="float32")
+    out = np.empty(len(x), dtype="int16")
+
+    assert to_pcm16(x, out) is out
+    np.testing.assert_array_equal(out, (np.clip(x, -1.0, 1.0) * 32767).astype("int16"))
@@ -0,0 +1,87 @@
+# tests/test_merge_events.py
+import sys
+import os
+
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.merge_events import EVENT_COLUMNS, merge_detection_dir, merge_detection_windows
+
+
+def test_overlapping_windows_become_one_event():
+    df = pd.DataFrame({
+        "file_id": ["A", "A", "A"],
+        "species_name": ["Erithacus rubecula"] * 3,
+        "start_s": [1.0, 3.0, 4.0],
+        "end_s": [4.0, 6.0, 7.0],
+        "confidence": [0.2, 0.6, 0.4],
+    })
+    ev = merge_detection_windows(df)
+
+    assert len(ev) == 1
+    row = ev.iloc[0]
+    assert (row["start_s"], row["end_s"]) == (1.0, 7.0)
+    assert row["max_confidence"] == 0.6
+    assert row["mean_confidence"] == pytest.approx(0.4)
+    assert row["n_windows"] == 3
+
+
+def test_gap_species_and_file_split_events():
+    df = pd.DataFrame({
+        # unsortiert, um die Sortierung mitzutesten
+        "file_id": ["A", "B", "A", "A", "A"],
+        "species_name": ["Turdus merula", "Turdus merula", "Turdus merula", "Turdus merula", "Parus major"],
+        "start_s": [20.0, 1.0, 1.0, 3.0, 2.0],
+        "end_s": [23.0, 4.0, 4.0, 6.0, 5.0],
+        "confidence": [0.5, 0.3, 0.3, 0.3, 0.9],
+    })
+    ev = merge_detection_windows(df)
+
+    assert ev[["file_id", "species_name", "start_s", "end_s"]].values.tolist() == [
+        ["A", "Parus major", 2.0, 5.0],
+        ["A", "Turdus merula", 1.0, 6.0],
+        ["A", "Turdus merula", 20.0, 23.0],
+        ["B", "Turdus merula", 1.0, 4.0],
+    ]
+
+
+def test_max_gap_bridges_short_pauses():
+    df = pd.DataFrame({
+        "file_id": ["A", "A"],
+        "species_name": ["Turdus merula"] * 2,
+        "start_s": [0.0, 4.0],
+        "end_s": [3.0, 7.0],
+        "confidence": [0.5, 0.5],
+    })
+    assert len(merge_detection_windows(df)) == 2
+    assert len(merge_detection_windows(df, max_gap_s=1.0)) == 1
+
+
+def test_empty_input():
+    df = pd.DataFrame(columns=["file_id", "species_name", "start_s", "end_s", "confidence"])
+    assert merge_detection_windows(df).empty
+
+
+def test_merge_detection_dir_writes_events_next_to_windows(tmp_path):
+    windows = pd.DataFrame({
+        "file_id": ["R1_20250407_060001"] * 3,
+        "start_s": [0.0, 1.0, 10.0],
+        "end_s": [3.0, 4.0, 13.0],
+        "species_name": ["Parus major"] * 3,
+        "confidence": [0.5, 0.7, 0.3],
+    })
+    windows.to_csv(tmp_path / "R1_20250407_060001.csv", index=False)
+
+    written = merge_detection_dir(tmp_path)
+
+    assert written == [tmp_path / "R1_20250407_060001.events.csv"]
+    ev = pd.read_csv(written[0])
+    assert list(ev.columns) == EVENT_COLUMNS
+    assert ev[["start_s", "end_s", "n_windows"]].values.tolist() == [[0.0, 4.0, 2], [10.0, 13.0, 1]]
+
+    # Aktuelle Events (und die Event-Dateien selbst) werden nicht erneut verarbeitet
+    assert merge_detection_dir(tmp_path) == []
+    assert len(merge_detection_dir(tmp_path, max_gap_s=10.0, overwrite=True)) == 1
+    assert len(pd.read_csv(written[0])) == 1
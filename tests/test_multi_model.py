@@ -0,0 +1,96 @@
+# tests/test_multi_model.py
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+import soundfile as sf
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.multi_model import ModelSpec, common_hop_s, plan_multi_chunks, predict_multi_chunked
+
+
+def grid_predictor(window_s, hop_s, calls):
+    """Ein Fenster pro Hop; merkt sich die Samplerate jedes Aufrufs."""
+    def predict_fn(samples, samplerate):
+        calls.append(samplerate)
+        dur = len(samples) / samplerate
+        starts = np.arange(0.0, dur - 1e-9, hop_s)
+        return pd.DataFrame({
+            "start_s": starts,
+            "end_s": starts + window_s,
+            "species_name": "Parus major",
+            "confidence": 0.5,
+        })
+    return predict_fn
+
+
+def failing_predictor(samples, samplerate):
+    raise RuntimeError("Modell kaputt")
+
+
+def make_wav(tmp_path, duration_s=60, sr=4000):
+    path = tmp_path / "REC_20250501_050000.wav"
+    sf.write(str(path), np.zeros(duration_s * sr, dtype="float32"), sr, subtype="PCM_16")
+    return path
+
+
+def test_common_hop():
+    specs = [
+        ModelSpec("birdnet", 48000, 3.0, 2.0, None),
+        ModelSpec("perch", 32000, 5.0, 2.0, None),
+    ]
+    assert common_hop_s(specs) == 3.0
+
+
+def test_one_pass_feeds_both_models(tmp_path):
+    path = make_wav(tmp_path)
+    calls_a, calls_b = [], []
+    specs = [
+        ModelSpec("birdnet", 2000, 3.0, 2.0, grid_predictor(3.0, 1.0, calls_a)),
+        ModelSpec("perch", 1000, 5.0, 2.0, grid_predictor(5.0, 3.0, calls_b)),
+    ]
+    # ~0.5 MB Budget -> mehrere Chunks
+    results, errors = predict_multi_chunked(path, specs, max_buffer_mb=0.5)
+
+    assert errors == {}
+    assert set(calls_a) == {2000} and set(calls_b) == {1000}
+    assert len(calls_a) > 1
+
+    bn = results["birdnet"]
+    assert bn["start_s"].tolist() == [float(s) for s in range(60)]
+    pe = results["perch"]
+    assert pe["start_s"].tolist() == [float(s) for s in range(0, 60, 3)]
+    assert (bn["file_id"] == "REC_20250501_050000").all()
+
+
+def test_failing_model_does_not_stop_others(tmp_path):
+    path = make_wav(tmp_path)
+    specs = [
+        ModelSpec("birdnet", 2000, 3.0, 2.0, grid_predictor(3.0, 1.0, [])),
+        ModelSpec("perch", 1000, 5.0, 2.0, failing_predictor),
+    ]
+    results, errors = predict_multi_chunked(path, specs, max_buffer_mb=0.5)
+
+    assert list(results) == ["birdnet"]
+    assert isinstance(errors["perch"], RuntimeError)
+
+
+def test_plan_multi_chunks_rejects_tiny_buffer():
+    specs = [
+        ModelSpec("birdnet", 48000, 3.0, 2.0, None),
+        ModelSpec("perch", 32000, 5.0, 2.0, None),
+    ]
+    chunk, overlap = plan_multi_chunks(96000, 1, specs, max_buffer_mb=256)
+    assert chunk % (3 * 96000) == 0  # Vielfaches des gemeinsamen Hops (3 s)
+
+    # Quelle + Mono + Resampling (float32) + int16-Chunk pro Modell passen ins Budget
+    frames = chunk + overlap
+    total = frames * (4 + 4) + sum(frames * r / 96000 * (4 + 2) for r in (48000, 32000))
+    assert total <= 256 * 1024 * 1024
+
+    # Reicht nicht für gemeinsamen Hop + Überlappung -> Fehler schon vor der Inference
+    with pytest.raises(ValueError):
+        plan_multi_chunks(96000, 1, specs, max_buffer_mb=4)
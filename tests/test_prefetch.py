@@ -0,0 +1,110 @@
+# tests/test_prefetch.py
+import sys
+import os
+import time
+
+import numpy as np
+import soundfile as sf
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.prefetch import MB, PrefetchPipeline, PrefetchStats
+
+
+def make_files(tmp_path, sizes):
+    rows = []
+    for i, size in enumerate(sizes):
+        p = tmp_path / f"REC_{i:02d}.wav"
+        p.write_bytes(bytes([i]) * size)
+        rows.append({"filepath": str(p), "file_id": p.stem})
+    return rows
+
+
+def test_reads_in_sorted_order_with_bounded_buffer(tmp_path):
+    rows = make_files(tmp_path, [MB // 2] * 6)
+    pipe = PrefetchPipeline(prefetch_mb=1.2, read_block_mb=0.1)
+
+    def stage(item):
+        time.sleep(0.01)  # Compute langsamer als Lesen -> Backpressure
+        return item.open().read(1)[0]
+
+    out = list(pipe.run(reversed(rows), stage))
+
+    assert [item.row["file_id"] for item, _, _ in out] == [r["file_id"] for r in rows]
+    assert [result for _, result, _ in out] == list(range(6))
+    assert all(error is None for _, _, error in out)
+    assert pipe.stats.peak_buffered_mb <= 1.2
+    assert pipe.stats.bytes_read == 6 * (MB // 2)
+    assert pipe.stats.bottleneck == "compute"
+
+
+def test_file_larger_than_budget_is_streamed(tmp_path):
+    rows = make_files(tmp_path, [4 * MB, 100])
+    pipe = PrefetchPipeline(prefetch_mb=1, read_block_mb=0.25)
+
+    out = list(pipe.run(rows, lambda item: len(item.open().read())))
+
+    assert [result for _, result, _ in out] == [4 * MB, 100]
+    # Nur Blöcke im RAM, nie die ganze Datei
+    assert pipe.stats.peak_buffered_mb <= 1
+
+
+def test_soundfile_reads_through_stream(tmp_path):
+    path = tmp_path / "REC_00.wav"
+    audio = np.random.default_rng(0).uniform(-0.5, 0.5, (50000, 2)).astype("float32")
+    sf.write(str(path), audio, 8000, subtype="FLOAT")
+    rows = [{"filepath": str(path), "file_id": "REC_00"}]
+
+    def stage(item):
+        with sf.SoundFile(item.open()) as f:
+            first = f.read(1000, dtype="float32")
+            f.seek(0)  # Rück-Seek hinter den Header -> direkt von der Platte
+            again = f.read(dtype="float32")
+        return first, again
+
+    pipe = PrefetchPipeline(prefetch_mb=0.1, read_block_mb=0.02)
+    (item, (first, again), error), = pipe.run(rows, stage)
+
+    assert error is None
+    np.testing.assert_array_equal(first, audio[:1000])
+    np.testing.assert_array_equal(again, audio)
+    assert pipe.stats.peak_buffered_mb <= 0.1
+
+
+def test_errors_are_reported_per_file(tmp_path):
+    rows = make_files(tmp_path, [100, 100])
+    rows.append({"filepath": str(tmp_path / "missing.wav"), "file_id": "missing"})
+
+    def stage(item):
+        if item.row["file_id"] == "REC_01":
+            raise ValueError("kaputt")
+        return "ok"
+
+    out = {item.row["file_id"]: (result, error) for item, result, error in PrefetchPipeline().run(rows, stage)}
+
+    assert out["REC_00"] == ("ok", None)
+    assert isinstance(out["REC_01"][1], ValueError)
+    assert isinstance(out["missing"][1], OSError)
+
+
+def test_bottleneck_uses_read_and_compute_time(tmp_path):
+    # Großer Puffer -> nie Backpressure; Wartezeit nur auf die erste Datei
+    rows = make_files(tmp_path, [1000] * 3)
+    pipe = PrefetchPipeline(prefetch_mb=64)
+
+    def stage(item):
+        time.sleep(0.05)
+        return item.open().read()
+
+    list(pipe.run(rows, stage))
+
+    assert pipe.stats.compute_s > 10 * pipe.stats.read_s
+    assert pipe.stats.producer_wait_s < 0.01
+    assert pipe.stats.bottleneck == "compute"
+
+
+def test_bottleneck_tie_uses_wait_times():
+    stats = PrefetchStats(read_s=1.0, compute_s=1.05, consumer_wait_s=0.5, producer_wait_s=0.1)
+    assert stats.bottleneck == "io"
+    stats = PrefetchStats(read_s=0.2, compute_s=1.6, consumer_wait_s=0.5, producer_wait_s=0.0)
+    assert stats.bottleneck == "compute"
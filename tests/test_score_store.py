@@ -0,0 +1,95 @@
+# tests/test_score_store.py
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.score_store import ScoreStore, flat_sigmoid
+
+
+def raw_scores(n_windows=50, n_species=20, seed=0):
+    """Dichte Logit-Matrix als lange Tabelle, wie predict(apply_sigmoid=False, top_k=None)."""
+    rng = np.random.default_rng(seed)
+    logits = rng.normal(-5, 3, size=(n_windows, n_species))
+    w, s = np.meshgrid(np.arange(n_windows), np.arange(n_species), indexing="ij")
+    return pd.DataFrame({
+        "start_s": w.ravel() * 1.0,
+        "end_s": w.ravel() * 1.0 + 3.0,
+        "species_name": [f"Species {i:02d}" for i in s.ravel()],
+        "confidence": logits.ravel(),
+    })
+
+
+def test_rethreshold_matches_direct_sigmoid(tmp_path):
+    raw = raw_scores()
+    store = ScoreStore(tmp_path, min_logit=-4.0)
+    store.write("F1", raw)
+
+    for threshold, sensitivity in [(0.1, 1.0), (0.05, 1.5), (0.5, 0.75)]:
+        got = store.detections(threshold, sensitivity)
+
+        conf = flat_sigmoid(raw["confidence"].to_numpy(), sensitivity)
+        expected = raw[conf >= threshold]
+        assert len(got) == len(expected)
+        assert set(zip(got["start_s"], got["species_name"])) == set(zip(expected["start_s"], expected["species_name"]))
+        np.testing.assert_allclose(np.sort(got["confidence"]), np.sort(conf[conf >= threshold]), rtol=1e-5)
+        assert (got["end_s"] - got["start_s"] == 3.0).all()
+
+
+def test_matrix_is_sparse_and_species_ids_are_shared(tmp_path):
+    store = ScoreStore(tmp_path, min_logit=-4.0)
+    store.write("F1", raw_scores(seed=1))
+    store.write("F2", raw_scores(seed=2).iloc[::-1])  # Reihenfolge egal
+
+    matrix, starts, _, floors = store.load("F1")
+    assert matrix.shape == (50, 20)
+    assert matrix.nnz < 50 * 20
+    assert (np.asarray(matrix.data) >= -4.0).all()
+    assert (np.asarray(floors) == -4.0).all()  # ohne top_k gilt überall min_logit
+
+    reopened = ScoreStore(tmp_path)
+    assert reopened.species == store.species
+    assert reopened.file_ids() == ["F1", "F2"]
+    assert set(reopened.detections(0.2)["file_id"]) == {"F1", "F2"}
+
+
+def test_threshold_below_floor_is_rejected(tmp_path):
+    store = ScoreStore(tmp_path, min_logit=-2.0)
+    store.write("F1", raw_scores())
+    with pytest.raises(ValueError):
+        store.detections(threshold=0.05, sensitivity=1.0)
+
+
+def top_k_rows(raw, k):
+    """Wie predict(top_k=k): pro Fenster nur die k höchsten Logits."""
+    return raw.sort_values("confidence", ascending=False).groupby("start_s").head(k)
+
+
+def test_top_k_cap_is_detected(tmp_path):
+    raw = raw_scores()
+    raw["confidence"] -= 10  # ruhige Fenster: kaum etwas über min_logit
+    raw.loc[raw["start_s"] == 7.0, "confidence"] = np.linspace(3.0, 8.0, 20)  # lautes Fenster
+    raw.loc[raw["start_s"] == 3.0, "confidence"] = np.linspace(-3.0, 0.0, 20)
+    store = ScoreStore(tmp_path, min_logit=-4.0, top_k=5)
+    store.write("F1", top_k_rows(raw[raw["confidence"] >= -4.0], 5))
+
+    _, starts, _, floors = store.load("F1")
+    floor = floors[list(starts).index(7.0)]
+    assert floor == pytest.approx(np.linspace(3.0, 8.0, 20)[-5])
+
+    # Über allen Floors: vollständig, auch im strict-Modus
+    assert len(store.detections(threshold=0.9995)) == 2
+
+    # Darunter würden Arten im lauten Fenster fehlen
+    with pytest.raises(ValueError):
+        store.detections(threshold=0.5)
+    flagged = store.detections(threshold=0.5, strict=False)
+    loud = flagged[flagged["start_s"] == 7.0]
+    assert len(loud) == 5 and not loud["window_complete"].any()
+    # Fenster 3.0 ist auch gekappt, aber sein Floor (sigmoid(-0.47)) liegt unter der Schwelle
+    assert flagged.loc[flagged["start_s"] != 7.0, "window_complete"].all()
+    assert len(flagged[flagged["start_s"] == 3.0]) == 1
@@ -0,0 +1,79 @@
+# tests/test_spectrogram_tiles.py
+import sys
+import os
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.prefetch import PrefetchPipeline
+from scripts.spectrogram_tiles import build_tiles, load_tile, mel_filterbank
+
+SR = 16000
+
+
+@pytest.fixture
+def tone_wav(tmp_path):
+    """30 s Stille mit einem 2-kHz-Ton von 10 s bis 12 s."""
+    t = np.arange(30 * SR) / SR
+    x = np.where((t >= 10) & (t < 12), 0.5 * np.sin(2 * np.pi * 2000 * t), 0.0)
+    path = tmp_path / "REC_20250501_050000.wav"
+    sf.write(str(path), x.astype("float32"), SR, subtype="FLOAT")
+    return path
+
+
+PARAMS = dict(hop_s=0.02, n_fft=512, n_mels=32, fmin=0, fmax=8000, levels=4)
+
+
+def test_streaming_equals_single_chunk(tone_wav, tmp_path):
+    build_tiles(tone_wav, tmp_path / "big", "f", max_buffer_mb=10, **PARAMS)
+    build_tiles(tone_wav, tmp_path / "small", "f", max_buffer_mb=0.05, **PARAMS)
+
+    for level in range(4):
+        a, _, _ = load_tile(tmp_path / "big", "f", 0, 30, level=level)
+        b, _, _ = load_tile(tmp_path / "small", "f", 0, 30, level=level)
+        np.testing.assert_array_equal(a, b)
+
+
+def test_pyramid_and_lookup(tone_wav, tmp_path):
+    meta = build_tiles(tone_wav, tmp_path, "f", **PARAMS)
+
+    assert meta["n_frames"][0] == 1 + (30 * SR - 512) // 320
+    assert meta["hop_s"] == pytest.approx([0.02, 0.04, 0.08, 0.16])
+    assert not (tmp_path / "f.tmp").exists()
+
+    # Der Ton liegt im Mel-Band um 2 kHz und nur zwischen 10 s und 12 s
+    band = int(np.argmax(mel_filterbank(SR, 512, 32, 0, 8000)[:, round(2000 / (SR / 512))]))
+    tone, _, _ = load_tile(tmp_path, "f", 10.2, 11.8, level=0)
+    quiet, _, _ = load_tile(tmp_path, "f", 2.0, 8.0, level=0)
+    assert tone.shape == (80, 32)
+    assert tone[:, band].min() > 200
+    assert quiet.max() == 0
+
+    # Level 1 = Max-Pooling von Level 0
+    l0, _, _ = load_tile(tmp_path, "f", 0, 30, level=0)
+    l1, _, _ = load_tile(tmp_path, "f", 0, 30, level=1)
+    np.testing.assert_array_equal(l1[:len(l0) // 2], l0[:len(l0) // 2 * 2].reshape(-1, 2, 32).max(axis=1))
+
+    # Automatische Level-Wahl nach Bildschirmbreite
+    _, _, level = load_tile(tmp_path, "f", 0, 30, max_frames=400)
+    assert level == 2
+
+
+def test_build_through_prefetch_stream(tone_wav, tmp_path):
+    build_tiles(tone_wav, tmp_path / "direct", "f", max_buffer_mb=0.05, **PARAMS)
+
+    rows = [{"filepath": str(tone_wav), "file_id": "f"}]
+    pipe = PrefetchPipeline(prefetch_mb=0.25, read_block_mb=0.05)
+    stage = lambda item: build_tiles(item.open(), tmp_path / "stream", "f", max_buffer_mb=0.05, **PARAMS)
+    (_, _, error), = pipe.run(rows, stage)
+
+    assert error is None
+    # Nie die ganze Datei (1.9 MB) im Vorlese-Puffer
+    assert pipe.stats.peak_buffered_mb <= 0.25
+    for level in range(4):
+        a, _, _ = load_tile(tmp_path / "direct", "f", 0, 30, level=level)
+        b, _, _ = load_tile(tmp_path / "stream", "f", 0, 30, level=level)
+        np.testing.assert_array_equal(a, b)
@@ -3,12 +3,13 @@ import pytest
 from datetime import datetime
 import sys
 import os
+import pandas as pd
 
 # TRICK 17: Damit Python den 'scripts' Ordner findet, fügen wir ihn zum Pfad hinzu.
 # Das ist nötig, weil 'tests' und 'scripts' Geschwister-Ordner sind.
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from scripts.utils import compute_week48
+from scripts.utils import calculate_slot_with_tolerance, compute_week48, sweep_slot_rules
 
 # --- Hier beginnen die Tests ---
 
@@ -134,4 +135,46 @@ def test_session_logic(hour, expected_label):
     # Aufruf mit deinen neuen Regeln
     result = get_session(dummy_dt, TEST_MORNING, TEST_EVENING)
     
-    assert result == expected_label
\ No newline at end of file
+    assert result == expected_label
+
+# --- Slot-Regeln aus der Config ---
+
+SUNRISE = datetime(2025, 5, 1, 6, 0, 0)
+
+@pytest.mark.parametrize(
+    "file_start, allowed, tolerance, expected_slot",
+    [
+        (datetime(2025, 5, 1, 4, 5, 0), [-120, -60, 0, 60, 120], 10, "sunrise_-120"),
+        (datetime(2025, 5, 1, 5, 48, 0), [-120, -60, 0, 60, 120], 10, None),            # 12 min daneben
+        (datetime(2025, 5, 1, 5, 48, 0), [-120, -60, 0, 60, 120], 15, "sunrise_0"),
+        (datetime(2025, 5, 1, 9, 0, 0), [-120, -60, 0, 60, 120], 10, None),             # +180 nicht erlaubt
+        (datetime(2025, 5, 1, 9, 0, 0), None, 10, "sunrise_180"),                       # ohne Liste: jede Stunde
+    ]
+)
+def test_slot_uses_allowed_slots(file_start, allowed, tolerance, expected_slot):
+    slot, _ = calculate_slot_with_tolerance(file_start, SUNRISE, "sunrise", tolerance, allowed)
+    assert slot == expected_slot
+
+
+def test_sweep_matches_single_slot_logic():
+    diffs = [-125.0, -58.0, 3.0, 14.0, 47.0, 181.0, float("nan")]
+    events = ["sunrise", "sunrise", "sunset", "sunset", "sunrise", "sunset", "sunset"]
+    tolerances = [5, 15]
+    slot_sets = [[-120, -60, 0, 60, 120], [-60, 0, 60]]
+
+    result = sweep_slot_rules(diffs, events, tolerances, slot_sets)
+
+    for tol in tolerances:
+        for slot_set in slot_sets:
+            expected = {}
+            for diff, event in zip(diffs, events):
+                slot = None
+                if diff == diff:  # nicht NaN
+                    start = SUNRISE + pd.Timedelta(minutes=diff)
+                    slot, _ = calculate_slot_with_tolerance(start, SUNRISE, event, tol, slot_set)
+                key = (event, slot.split("_")[1] if slot else "no_slot")
+                expected[key] = expected.get(key, 0) + 1
+
+            sub = result[(result["tolerance_min"] == tol) & (result["allowed_slot_min"] == str(slot_set))]
+            got = {(r.event, r.slot): r.n_files for r in sub.itertuples()}
+            assert got == expected